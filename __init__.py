@@ -2,15 +2,21 @@ from .image_text_nodes import AddSingleObjectNode, AddSingleTextNode, ColorNode,
 from .prompt_selector_node import PromptSelectorNode
 from .save_image_text_node import SaveImageAndTextNode
 from .log_node import LogNode
+from .probe_nodes import ProbeStartNode, ProbeEndNode
+from .layer_compositor_node import LayerCompositorNode, BlendLayerNode
 
 NODE_CLASS_MAPPINGS = {
     "AddSingleObject": AddSingleObjectNode, 
     "AddSingleText": AddSingleTextNode,
     "ColorNode": ColorNode,
     "AddLogo": AddLogoNode,
+    "LayerCompositor": LayerCompositorNode,
+    "BlendLayer": BlendLayerNode,
     "PromptSelector": PromptSelectorNode,
     "SaveImageAndText": SaveImageAndTextNode,
-    "Log": LogNode
+    "Log": LogNode,
+    "ProbeStart": ProbeStartNode,
+    "ProbeEnd": ProbeEndNode
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
@@ -18,9 +24,13 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "AddSingleText": "MisterMR - Text",
     "ColorNode": "MisterMR - Color",
     "AddLogo": "MisterMR - Add Logo",
+    "LayerCompositor": "MisterMR - Layer Compositor",
+    "BlendLayer": "MisterMR - Blend Layer",
     "PromptSelector": "MisterMR - Prompt Selector",
     "SaveImageAndText": "MisterMR - Save Image and Text",
-    "Log": "MisterMR - Log"
+    "Log": "MisterMR - Log",
+    "ProbeStart": "MisterMR - Probe Start",
+    "ProbeEnd": "MisterMR - Probe End"
 }
 WEB_DIRECTORY = "./web/js"
 __all__ = ['NODE_CLASS_MAPPINGS', 'NODE_DISPLAY_NAME_MAPPINGS', "WEB_DIRECTORY"]
@@ -0,0 +1,79 @@
+"""Import-time budget check for the MisterMR package.
+
+Imports the package in a fresh interpreter, with torch, numpy and PIL already
+loaded (ComfyUI has imported them long before custom nodes load) and no
+ComfyUI server running, then fails if the import took longer than the budget
+or pulled in modules that must stay lazy.
+
+Usage:
+    python benchmarks/check_import_time.py                 # default budget
+    python benchmarks/check_import_time.py --budget-ms 100 --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the package must not import at load time
+FORBIDDEN_MODULES = ("matplotlib", "server", "aiohttp", "psutil")
+
+CHILD_SCRIPT = r"""
+import importlib.util, json, os, sys, time, types
+import numpy, torch, PIL.Image, PIL.ImageDraw, PIL.ImageFont  # Loaded by ComfyUI already
+
+folder_paths = types.ModuleType("folder_paths")
+folder_paths.get_output_directory = lambda: os.getcwd()
+sys.modules["folder_paths"] = folder_paths
+
+repo_dir = sys.argv[1]
+before = set(sys.modules)
+started = time.perf_counter()
+spec = importlib.util.spec_from_file_location(
+    "mistermr_nodes", os.path.join(repo_dir, "__init__.py"), submodule_search_locations=[repo_dir]
+)
+package = importlib.util.module_from_spec(spec)
+sys.modules["mistermr_nodes"] = package
+spec.loader.exec_module(package)
+elapsed_ms = (time.perf_counter() - started) * 1000.0
+print(json.dumps({"elapsed_ms": elapsed_ms, "new_modules": sorted(set(sys.modules) - before)}))
+"""
+
+
+def measure_import():
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, REPO_DIR],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the MisterMR package")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="maximum median import time")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to measure")
+    args = parser.parse_args()
+
+    runs = [measure_import() for _ in range(args.runs)]
+    timings = sorted(run["elapsed_ms"] for run in runs)
+    median_ms = timings[len(timings) // 2]
+
+    failures = []
+    loaded = set(runs[0]["new_modules"])
+    for name in FORBIDDEN_MODULES:
+        if name in loaded or any(module.startswith(name + ".") for module in loaded):
+            failures.append(f"'{name}' is imported at package load")
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+
+    print(f"Package import: median {median_ms:.1f} ms over {args.runs} runs "
+          f"({', '.join(f'{t:.1f}' for t in timings)} ms), {len(loaded)} new modules")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
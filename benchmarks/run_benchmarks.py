@@ -0,0 +1,330 @@
+"""Benchmark harness for the MisterMR nodes.
+
+Runs AddSingleObject, AddSingleText, AddLogo, SaveImageAndText and
+PromptSelector directly, outside ComfyUI, with stub `folder_paths` and
+`server` modules. Every drawing/saving case is swept over resolutions from
+512x512 to 4K and batch sizes from 1 to 64 on the CPU, and reports latency
+percentiles, throughput (frames or prompt variants per second) and peak
+resident memory. Each case allocates its input batch only while it is measured.
+
+Usage:
+    python benchmarks/run_benchmarks.py                   # full sweep
+    python benchmarks/run_benchmarks.py --quick           # small sweep
+    python benchmarks/run_benchmarks.py --save-baseline   # store results as the baseline
+    python benchmarks/run_benchmarks.py --nodes text logo --resolutions 1024 --batches 1 16
+
+When the baseline file exists, each case's p50 latency is compared against
+it and the script exits with status 1 if any case regressed by more than
+--threshold (default 10%).
+"""
+import argparse
+import functools
+import gc
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+
+import torch
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_DIR, "benchmarks", "baseline.json")
+
+RESOLUTIONS = {
+    "512": (512, 512),
+    "1024": (1024, 1024),
+    "2048": (2048, 2048),
+    "4k": (3840, 2160),
+}
+BATCH_SIZES = (1, 4, 16, 64)
+NODES = ("object", "text", "logo", "save", "prompt")
+
+
+# --- Stub ComfyUI modules ---------------------------------------------------
+
+def install_stubs(output_dir):
+    """Register minimal `folder_paths` and `server` modules before the package is imported."""
+    folder_paths = types.ModuleType("folder_paths")
+    folder_paths.get_output_directory = lambda: output_dir
+
+    def get_save_image_path(filename_prefix, output_dir, image_width=0, image_height=0):
+        subfolder = os.path.dirname(os.path.normpath(filename_prefix))
+        filename = os.path.basename(os.path.normpath(filename_prefix))
+        full_output_folder = os.path.join(output_dir, subfolder)
+        os.makedirs(full_output_folder, exist_ok=True)
+        counter = len(os.listdir(full_output_folder)) + 1
+        return full_output_folder, filename, counter, subfolder, filename_prefix
+
+    folder_paths.get_save_image_path = get_save_image_path
+
+    class Routes:
+        def get(self, path):
+            return lambda handler: handler
+
+        post = get
+
+    class PromptServer:
+        instance = None
+
+        def __init__(self):
+            self.routes = Routes()
+
+        def send_sync(self, event, data, sid=None):
+            pass
+
+    PromptServer.instance = PromptServer()
+    server = types.ModuleType("server")
+    server.PromptServer = PromptServer
+
+    sys.modules["folder_paths"] = folder_paths
+    sys.modules["server"] = server
+
+
+def import_package():
+    """Import the repository as a package, whatever its directory is called."""
+    spec = importlib.util.spec_from_file_location(
+        "mistermr_nodes", os.path.join(REPO_DIR, "__init__.py"), submodule_search_locations=[REPO_DIR]
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules["mistermr_nodes"] = package
+    spec.loader.exec_module(package)
+    return package
+
+
+# --- Measurement ------------------------------------------------------------
+
+def current_rss():
+    """Resident set size in bytes, or None when it can't be read."""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class PeakMemorySampler:
+    """Polls the RSS on a background thread and keeps the peak above the starting value."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start_rss = None
+        self.peak_rss = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start_rss = self.peak_rss = current_rss()
+        if self.start_rss is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = current_rss()
+            if rss is not None and rss > self.peak_rss:
+                self.peak_rss = rss
+            time.sleep(self.interval)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    @property
+    def peak_delta(self):
+        if self.start_rss is None:
+            return None
+        return self.peak_rss - self.start_rss
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(fn, items, unit, repeat, warmup):
+    """Run fn() warmup + repeat times and summarize latency, throughput and peak memory.
+
+    Throughput is reported as "<unit>_per_s": `items` units (frames, prompt
+    variants) are produced per call.
+    """
+    for _ in range(warmup):
+        fn()
+    timings = []
+    with PeakMemorySampler() as memory:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000.0)
+    p50 = percentile(timings, 0.50)
+    return {
+        "p50_ms": p50,
+        "p90_ms": percentile(timings, 0.90),
+        "p99_ms": percentile(timings, 0.99),
+        "min_ms": min(timings),
+        f"{unit}_per_s": items * 1000.0 / p50 if p50 > 0 else None,
+        "peak_rss_delta_mb": memory.peak_delta / 2 ** 20 if memory.peak_delta is not None else None,
+    }
+
+
+# --- Cases ------------------------------------------------------------------
+
+def image_cases(package, node_name, width, height, batch, output_dir):
+    """Return a zero-argument callable running one node on a random batch."""
+    image = torch.rand(batch, height, width, 3)
+
+    if node_name == "object":
+        node = package.NODE_CLASS_MAPPINGS["AddSingleObject"]()
+        return lambda: node.draw_object(image, width // 4, height // 4, width // 2, height // 2, "circle",
+                                        4, "#ffffff", "yes", fill_color="#3366cc")
+    if node_name == "text":
+        node = package.NODE_CLASS_MAPPINGS["AddSingleText"]()
+        return lambda: node.draw_text(image, "Benchmark caption", width // 8, height // 8, width * 3 // 4,
+                                      height // 4, "center", 48, "default", "#ffffff")
+    if node_name == "logo":
+        node = package.NODE_CLASS_MAPPINGS["AddLogo"]()
+        logo = torch.rand(1, 256, 256, 3)
+        return lambda: node.add_logo(image, logo, 16, 16, 200, 200, "yes", 0.8)
+    if node_name == "save":
+        node = package.NODE_CLASS_MAPPINGS["SaveImageAndText"]()
+
+        def save():
+            node.save_image_and_text(image, "bench/frame", text="benchmark caption")
+            shutil.rmtree(os.path.join(output_dir, "bench"), ignore_errors=True)
+
+        return save
+    raise ValueError(node_name)
+
+
+def prompt_cases(package):
+    """PromptSelector cases: (name, factory of the callable, variants produced per call, "variants")."""
+    node = package.NODE_CLASS_MAPPINGS["PromptSelector"]()
+    words = "\n".join(f"word{i}" for i in range(1000))
+    sweep = "\n".join(f"style{i}" for i in range(200))
+    cases = [
+        ("prompt/select_1000_words", lambda: node.replace_word(
+            "A photo of REPLACE_WORD at sunset", "REPLACE_WORD", words, "enabled", 500, unique_id="bench"), 1),
+        ("prompt/expand_200_words", lambda: node.replace_word(
+            "A photo in REPLACE_WORD style", "REPLACE_WORD", sweep, "disabled", 0,
+            expansion="cartesian", unique_id="bench"), 200),
+        ("prompt/cartesian_200x5", lambda: node.replace_word(
+            "A REPLACE_WORD photo at TIME", "REPLACE_WORD", sweep, "disabled", 0, expansion="cartesian",
+            extra_placeholders="TIME=dawn|noon|dusk|night|midnight", unique_id="bench"), 1000),
+    ]
+    # Default argument binds each callable, so the factory doesn't pick up the last one
+    return [(name, lambda fn=fn: fn, variants, "variants") for name, fn, variants in cases]
+
+
+# --- Baseline ---------------------------------------------------------------
+
+def compare_to_baseline(results, baseline, threshold):
+    """Print the p50 change of every case against the baseline; return the regressed case names."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference or not reference.get("p50_ms"):
+            continue
+        change = result["p50_ms"] / reference["p50_ms"] - 1.0
+        marker = ""
+        if change > threshold:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<40} {reference['p50_ms']:>10.2f} -> {result['p50_ms']:>10.2f} ms ({change:+.1%}){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MisterMR nodes")
+    parser.add_argument("--nodes", nargs="+", choices=NODES, default=list(NODES))
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument("--batches", nargs="+", type=int, default=list(BATCH_SIZES))
+    parser.add_argument("--repeat", type=int, default=5, help="measured runs per case")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured runs per case")
+    parser.add_argument("--quick", action="store_true", help="512/1024 only, batches 1 and 4, 3 runs")
+    parser.add_argument("--max-batch-gb", type=float, default=2.0,
+                        help="skip cases whose input batch is larger than this many GB")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed p50 slowdown before failing")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.resolutions = ["512", "1024"]
+        args.batches = [1, 4]
+        args.repeat = 3
+
+    output_dir = tempfile.mkdtemp(prefix="mrm-bench-")
+    install_stubs(output_dir)
+    package = import_package()
+    torch.set_grad_enabled(False)
+
+    print(f"torch {torch.__version__}, {platform.processor() or platform.machine()}, "
+          f"{torch.get_num_threads()} threads")
+    print(f"{'case':<40} {'p50 ms':>10} {'p90 ms':>10} {'per s':>10} {'unit':<9} {'peak MB':>10}")
+
+    results = {}
+    try:
+        for node_name in args.nodes:
+            if node_name == "prompt":
+                cases = prompt_cases(package)
+            else:
+                cases = []
+                for resolution in args.resolutions:
+                    width, height = RESOLUTIONS[resolution]
+                    for batch in args.batches:
+                        if batch * width * height * 3 * 4 > args.max_batch_gb * 2 ** 30:
+                            continue
+                        # Factories: a case's input batch only exists while that case is measured
+                        cases.append((f"{node_name}/{resolution}/b{batch}",
+                                      functools.partial(image_cases, package, node_name, width, height, batch,
+                                                        output_dir),
+                                      batch, "frames"))
+
+            for name, make_fn, items, unit in cases:
+                fn = make_fn()
+                result = measure(fn, items, unit, args.repeat, args.warmup)
+                del fn  # Release the input batch before the next case allocates its own
+                gc.collect()
+                results[name] = result
+                peak = result["peak_rss_delta_mb"]
+                print(f"{name:<40} {result['p50_ms']:>10.2f} {result['p90_ms']:>10.2f} "
+                      f"{result[f'{unit}_per_s']:>10.1f} {unit:<9} {peak if peak is not None else float('nan'):>10.1f}")
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nComparison with {args.baseline}:")
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
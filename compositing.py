@@ -0,0 +1,113 @@
+import torch
+
+
+def clip_region(x, y, width, height, image_width, image_height):
+    """Intersect a width x height rectangle placed at (x, y) with the image bounds.
+
+    Returns (x0, y0, x1, y1, offset_x, offset_y) where the offsets locate the clipped
+    area inside the rectangle, or None if the rectangle lies completely outside.
+    """
+    x0 = max(x, 0)
+    y0 = max(y, 0)
+    x1 = min(x + width, image_width)
+    y1 = min(y + height, image_height)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return x0, y0, x1, y1, x0 - x, y0 - y
+
+
+def _place(frames, x, y, layer_height, layer_width):
+    """Clip a layer placed at (x, y) to the frames: ((x0, y0, x1, y1), rows, cols), or None.
+
+    `rows` and `cols` slice the visible part out of the layer.
+    """
+    region = clip_region(x, y, layer_width, layer_height, frames.shape[-2], frames.shape[-3])
+    if region is None:
+        return None
+    x0, y0, x1, y1, offset_x, offset_y = region
+    return (x0, y0, x1, y1), slice(offset_y, offset_y + (y1 - y0)), slice(offset_x, offset_x + (x1 - x0))
+
+
+def _blend_over(frames, rect, alpha, premultiplied):
+    """out = dst * (1 - alpha) + premultiplied inside `rect`, in place.
+
+    `alpha` ends in a size-1 channel axis and `premultiplied` holds the layer
+    color already multiplied by it; both broadcast against the frames' region.
+    """
+    x0, y0, x1, y1 = rect
+    target = frames[..., y0:y1, x0:x1, :3]
+    target.mul_(1.0 - alpha).add_(premultiplied)
+
+    # Composite "over" for images that carry their own alpha channel
+    if frames.shape[-1] >= 4:
+        target_alpha = frames[..., y0:y1, x0:x1, 3:4]
+        target_alpha.mul_(1.0 - alpha).add_(alpha)
+
+    return frames
+
+
+def blend_coverage(frames, x, y, coverage, rgba):
+    """Alpha-blend a solid RGBA color through a coverage mask, in place.
+
+    `frames` is a float tensor in [0, 1] shaped [H,W,C] or [B,H,W,C]; only the
+    area covered by the mask is touched. `coverage` is a [h,w] float mask in
+    [0, 1] placed with its top-left corner at (x, y). `rgba` is a 0-255 tuple.
+    """
+    if coverage is None or rgba is None or len(rgba) < 4 or rgba[3] <= 0:
+        return frames
+
+    placed = _place(frames, x, y, *coverage.shape)
+    if placed is None:
+        return frames
+    rect, rows, cols = placed
+
+    alpha = coverage[rows, cols].to(device=frames.device, dtype=frames.dtype) * (rgba[3] / 255.0)
+    alpha = alpha.unsqueeze(-1)
+    color = torch.tensor([c / 255.0 for c in rgba[:3]], dtype=frames.dtype, device=frames.device)
+    return _blend_over(frames, rect, alpha, alpha * color)
+
+
+def blend_premultiplied(frames, x, y, premultiplied, alpha):
+    """Alpha-blend a premultiplied RGB layer in place: out = dst * (1 - alpha) + premultiplied.
+
+    `premultiplied` is [h,w,3] and `alpha` [h,w], both float in [0, 1], placed
+    with their top-left corner at (x, y) on `frames` ([H,W,C] or [B,H,W,C]).
+    """
+    placed = _place(frames, x, y, *alpha.shape)
+    if placed is None:
+        return frames
+    rect, rows, cols = placed
+
+    layer_alpha = alpha[rows, cols].to(device=frames.device, dtype=frames.dtype).unsqueeze(-1)
+    layer_color = premultiplied[rows, cols].to(device=frames.device, dtype=frames.dtype)
+    return _blend_over(frames, rect, layer_alpha, layer_color)
+
+
+def blend_layer(frames, x, y, color, alpha):
+    """Alpha-blend a batch of straight-color layers in place onto a [B,H,W,C] batch.
+
+    `color` is [L,h,w,3] and `alpha` [L,h,w] (or [h,w]), placed with their
+    top-left corner at (x, y). Frame i gets layer i % L, so a single layer
+    covers the whole batch. The layer is moved to the frames' device.
+    """
+    if alpha.dim() == 2:
+        alpha = alpha.unsqueeze(0)
+    if color.dim() == 3:
+        color = color.unsqueeze(0)
+    placed = _place(frames, x, y, alpha.shape[-2], alpha.shape[-1])
+    if placed is None:
+        return frames
+    rect, rows, cols = placed
+
+    layer_alpha = alpha[:, rows, cols].to(device=frames.device, dtype=frames.dtype).unsqueeze(-1)
+    layer_color = color[:, rows, cols, :3].to(device=frames.device, dtype=frames.dtype)
+
+    batch_size = frames.shape[0]
+    if layer_alpha.shape[0] != batch_size or layer_color.shape[0] != batch_size:
+        # Pair frames with layers cyclically; a single layer just broadcasts
+        if layer_alpha.shape[0] > 1:
+            layer_alpha = layer_alpha[torch.arange(batch_size, device=frames.device) % layer_alpha.shape[0]]
+        if layer_color.shape[0] > 1:
+            layer_color = layer_color[torch.arange(batch_size, device=frames.device) % layer_color.shape[0]]
+
+    return _blend_over(frames, rect, layer_alpha, layer_color * layer_alpha)
@@ -0,0 +1,134 @@
+"""Process-wide font index and LRU cache of loaded FreeType fonts.
+
+The font directories are scanned once, recursively and only when a font is
+first requested, into a family -> path index. Loaded fonts are kept in an LRU
+cache keyed by (path, size) (64 fonts, MISTERMR_FONT_CACHE_SIZE), so only the
+first use of a font pays for disk I/O and TTF parsing.
+"""
+import os
+import sys
+import threading
+
+from PIL import ImageFont
+
+from .logging_utils import get_logger
+from .lru_cache import LRUCache
+
+logger = get_logger("fonts")
+
+FONT_EXTENSIONS = ('.ttf', '.ttc', '.otf')
+
+_lock = threading.RLock()
+# FreeType font objects aren't thread-safe: hold this around measuring or drawing with them
+font_lock = threading.Lock()
+_font_index = None
+loaded_fonts = LRUCache(64, "MISTERMR_FONT_CACHE_SIZE")
+_failed_paths = set()
+_default_font = None
+
+
+def get_font_dirs():
+    """Font directories to scan for the current OS."""
+    if sys.platform == 'win32':
+        return [
+            os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts'),
+            os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Microsoft\\Windows\\Fonts')
+        ]
+    elif sys.platform == 'darwin':  # macOS
+        return ['/System/Library/Fonts', '/Library/Fonts', '~/Library/Fonts']
+    else:  # Linux and others
+        return ['/usr/share/fonts/truetype', '/usr/local/share/fonts']
+
+
+def get_default_font_files():
+    """Fallback font files to try, in order, when no family is requested or found."""
+    if sys.platform == 'win32':
+        return ['arial.ttf', 'segoeui.ttf', 'calibri.ttf', 'verdana.ttf']
+    elif sys.platform == 'darwin':  # macOS
+        return ['Helvetica.ttc', 'Arial.ttf', 'Times.ttc']
+    else:  # Linux and others
+        return ['DejaVuSans.ttf', 'FreeSans.ttf', 'Ubuntu-R.ttf']
+
+
+def _scan_font_dirs():
+    """Walk every font directory once and index fonts by family and file name."""
+    index = {}
+    for font_dir in get_font_dirs():
+        font_dir = os.path.expanduser(font_dir)
+        if not os.path.isdir(font_dir):
+            continue
+        for root, _dirs, files in os.walk(font_dir):
+            for file_name in sorted(files):
+                stem, ext = os.path.splitext(file_name)
+                if ext.lower() not in FONT_EXTENSIONS:
+                    continue
+                path = os.path.join(root, file_name)
+                # Earlier directories win, matching the old lookup order
+                index.setdefault(stem.lower(), path)
+                index.setdefault(file_name.lower(), path)
+    return index
+
+
+def get_font_index():
+    """Return the family -> path index, scanning the font directories on first use."""
+    global _font_index
+    if _font_index is None:
+        with _lock:
+            if _font_index is None:
+                _font_index = _scan_font_dirs()
+    return _font_index
+
+
+def find_font(name):
+    """Resolve a font family ("Arial") or file name ("arial.ttf") to a path, or None."""
+    if not name:
+        return None
+    return get_font_index().get(name.lower())
+
+
+def load_font(font_path, font_size):
+    """Load a FreeType font through the LRU cache. Returns None if the file can't be loaded."""
+    key = (font_path, font_size)
+    font = loaded_fonts.get(key)
+    if font is not None:
+        return font
+    with _lock:
+        if font_path in _failed_paths:
+            return None
+
+    try:
+        font = ImageFont.truetype(font_path, font_size)
+    except Exception as e:
+        logger.warning("Failed to load font %s: %s", font_path, e)
+        with _lock:
+            _failed_paths.add(font_path)
+        return None
+
+    loaded_fonts.put(key, font)
+    return font
+
+
+def load_default_font():
+    """PIL's built-in font, loaded once."""
+    global _default_font
+    if _default_font is None:
+        _default_font = ImageFont.load_default()
+    return _default_font
+
+
+def font_cache_key(font):
+    """Stable identifier of a font object, for caches keyed on the font used."""
+    path = getattr(font, 'path', None)
+    if path is None:
+        return ('default', id(font))
+    return (path, getattr(font, 'size', None), getattr(font, 'index', 0))
+
+
+def clear_font_cache(rescan=False):
+    """Drop every loaded font; with rescan=True the font directories are indexed again."""
+    global _font_index
+    loaded_fonts.clear()
+    with _lock:
+        _failed_paths.clear()
+        if rescan:
+            _font_index = None
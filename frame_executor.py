@@ -0,0 +1,67 @@
+"""Shared thread pool that processes the frames of a batch in parallel.
+
+PIL releases the GIL while it draws, resizes and encodes, so the per-frame
+PIL work of the drawing and logo nodes scales across cores on plain threads.
+Results always come back in frame order. The pool size defaults to the CPU
+count and can be changed with MISTERMR_WORKERS or set_worker_count(); 1 runs
+everything serially on the calling thread.
+"""
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_lock = threading.Lock()
+_executor = None
+_local = threading.local()
+_worker_count = max(1, int(os.environ.get("MISTERMR_WORKERS", str(os.cpu_count() or 1))))
+
+
+def get_worker_count():
+    return _worker_count
+
+
+def set_worker_count(count):
+    """Resize the pool; the old pool finishes its queued frames in the background."""
+    global _worker_count, _executor
+    with _lock:
+        _worker_count = max(1, int(count))
+        old, _executor = _executor, None
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_worker_count, thread_name_prefix="mrm-frames", initializer=_mark_worker
+            )
+        return _executor
+
+
+def _mark_worker():
+    _local.is_worker = True
+
+
+def map_frames(fn, count):
+    """Return [fn(0), ..., fn(count - 1)], computed on the pool, in order.
+
+    Runs serially for a single frame, a single worker, or when called from a
+    pool thread (nested use would otherwise wait on its own pool). Exceptions
+    propagate to the caller like a serial loop.
+    """
+    if count <= 1 or _worker_count <= 1 or getattr(_local, "is_worker", False):
+        return [fn(i) for i in range(count)]
+    return list(_get_executor().map(fn, range(count)))
+
+
+def _shutdown():
+    with _lock:
+        executor = _executor
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+atexit.register(_shutdown)
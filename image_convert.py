@@ -0,0 +1,156 @@
+"""Shared IMAGE tensor <-> uint8 / PIL conversion with pooled buffers.
+
+The nodes used to convert with `(frame * 255).astype(np.uint8)` and
+`np.array(pil).astype(np.float32) / 255.0`, which allocate a float temporary,
+a uint8 copy and another float array per frame. Here frames are scaled and
+clamped in row bands through a small reusable float scratch, written straight
+into a pooled uint8 buffer, and converted back into a preallocated float
+output in place. Per frame that leaves the uint8 buffer and the output as the
+only full-size allocations.
+
+Buffers come from a pool keyed by (shape, dtype); up to
+MISTERMR_BUFFER_POOL_SIZE (default: the frame worker count, at least 4) idle
+buffers are kept per key.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import torch
+from PIL import Image
+
+from .frame_executor import get_worker_count, map_frames
+
+# Rows scaled at a time on the CPU, bounding the float scratch to a band instead of a frame
+BAND_ROWS = 256
+
+
+class BufferPool:
+    """Reusable numpy buffers keyed by (shape, dtype)."""
+
+    def __init__(self, max_per_key=4):
+        self.max_per_key = max(0, int(max_per_key))
+        self._lock = threading.Lock()
+        self._free = {}
+
+    def acquire(self, shape, dtype=np.uint8):
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                return free.pop()
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, buffer):
+        key = (buffer.shape, buffer.dtype.str)
+        with self._lock:
+            free = self._free.setdefault(key, [])
+            if len(free) < self.max_per_key:
+                free.append(buffer)
+
+    @contextmanager
+    def borrow(self, shape, dtype=np.uint8):
+        """Buffer for the duration of a with-block; nothing may keep a reference to it afterwards."""
+        buffer = self.acquire(shape, dtype)
+        try:
+            yield buffer
+        finally:
+            self.release(buffer)
+
+    def clear(self):
+        with self._lock:
+            self._free.clear()
+
+    def idle_bytes(self):
+        with self._lock:
+            return sum(buffer.nbytes for free in self._free.values() for buffer in free)
+
+
+# Enough idle buffers for every frame worker to reuse one
+pool = BufferPool(int(os.environ.get("MISTERMR_BUFFER_POOL_SIZE", str(max(4, get_worker_count())))))
+
+
+def tensor_to_uint8(frames, out=None):
+    """Quantize a float [H,W,C] or [B,H,W,C] tensor in [0, 1] to uint8 like `(x * 255).astype(np.uint8)`.
+
+    Values are clamped to [0, 255] and truncated. The result is written into
+    `out` (a uint8 numpy array of the same shape) when given. CUDA tensors are
+    quantized on the device, so only the uint8 data crosses to the host.
+    """
+    frames = frames.detach()
+    if out is None:
+        out = np.empty(tuple(frames.shape), dtype=np.uint8)
+    target = torch.from_numpy(out)
+
+    if frames.device.type != "cpu":
+        target.copy_(frames.mul(255.0).clamp_(0.0, 255.0).to(torch.uint8))
+        return out
+
+    # Row bands along the height axis through a pooled float scratch
+    rows = frames.shape[-3]
+    band_shape = tuple(frames.shape[:-3]) + (min(rows, BAND_ROWS),) + tuple(frames.shape[-2:])
+    with pool.borrow(band_shape, np.float32) as scratch_array:
+        scratch = torch.from_numpy(scratch_array)
+        for start in range(0, rows, BAND_ROWS):
+            stop = min(rows, start + BAND_ROWS)
+            band = scratch[..., :stop - start, :, :]
+            torch.mul(frames[..., start:stop, :, :], 255.0, out=band)
+            band.clamp_(0.0, 255.0)
+            target[..., start:stop, :, :].copy_(band)  # float -> uint8 truncates like astype
+    return out
+
+
+def uint8_to_tensor(array, out=None, device=None):
+    """Convert a uint8 array ([H,W,C] or [B,H,W,C]) to float in [0, 1], written into `out` when given."""
+    array = np.ascontiguousarray(array)
+    if not array.flags.writeable:
+        # torch.from_numpy warns on read-only arrays (np.asarray of a PIL image is one): go through a pooled copy
+        with pool.borrow(array.shape, array.dtype) as buffer:
+            np.copyto(buffer, array)
+            return uint8_to_tensor(buffer, out, device)
+    source = torch.from_numpy(array)
+    if out is None:
+        out = torch.empty(source.shape, dtype=torch.float32, device=device or "cpu")
+    # uint8 -> float conversion happens inside copy_, then the scale is applied in place
+    out.copy_(source).div_(255.0)
+    return out
+
+
+def pil_to_tensor(image, out=None, device=None):
+    """Convert a PIL Image to a float [H,W,C] tensor, written into `out` when given."""
+    array = np.asarray(image)
+    if array.ndim == 2:
+        array = array[..., np.newaxis]
+    return uint8_to_tensor(array, out, device)
+
+
+@contextmanager
+def borrowed_pil_image(frame):
+    """PIL Image view of a float [H,W,C] tensor frame, backed by a pooled uint8 buffer.
+
+    The image shares the buffer, so it is only valid inside the with-block; PIL
+    copies it before drawing on it, and saving only reads it.
+    """
+    with pool.borrow(tuple(frame.shape), np.uint8) as buffer:
+        tensor_to_uint8(frame, buffer)
+        yield Image.fromarray(buffer[..., 0] if buffer.shape[-1] == 1 else buffer)
+
+
+def map_frames_pil(frames, draw_fn):
+    """Run draw_fn(index, pil_frame) -> PIL Image over a [B,H,W,C] batch.
+
+    Frames run in parallel on the shared frame pool. Each one is converted
+    through a pooled buffer (one in flight per worker) and its drawn result is
+    written straight into its slot of a preallocated float output on the
+    input's device, so the output order never depends on scheduling.
+    """
+    result = torch.empty(tuple(frames.shape), dtype=torch.float32, device=frames.device)
+
+    def process(i):
+        with borrowed_pil_image(frames[i]) as pil_frame:
+            drawn = draw_fn(i, pil_frame)
+            pil_to_tensor(drawn, out=result[i])
+
+    map_frames(process, frames.shape[0])
+    return result
@@ -1,75 +1,52 @@
+import functools
+import inspect
+
 import torch
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
-from typing import List, Tuple, Union
-import matplotlib.colors as mcolors
-import os
-import sys
+from PIL import ImageDraw, ImageFont
+
+from .font_cache import find_font, font_lock, get_default_font_files, load_default_font, load_font
+from .image_convert import map_frames_pil, tensor_to_uint8
+from .logging_utils import get_logger
+from .logo_cache import draw_logo_layer, get_logo_layers
+from .named_colors import lookup_color
+from .overlay_layers import empty_overlay, render_overlay
+from .shape_rasterizer import draw_shape
+from .text_atlas import draw_text_mask
+from .text_layout import LAYOUT_MODES, layout_text
+
+logger = get_logger("image_text")
 
 def color_to_rgb(color_name):
     """Convert color name to RGB tuple."""
-    try:
-        rgb = mcolors.to_rgb(color_name)
-        return tuple(int(x * 255) for x in rgb)
-    except:
+    rgb = lookup_color(color_name)
+    if rgb is None:
         return (255, 255, 255)  # Default to white if color name is invalid
+    return rgb
 
 def get_system_font(font_size: int, font_family: str = None) -> ImageFont.FreeTypeFont:
-    """Try to load a system font with fallbacks."""
+    """Try to load a system font with fallbacks, through the shared font cache."""
     # If a specific font family is requested, try to load it first
     if font_family and font_family.lower() != "default":
-        # First try standard paths based on OS
-        if sys.platform == 'win32':
-            font_dirs = [
-                os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts'),
-                os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Microsoft\\Windows\\Fonts')
-            ]
-        elif sys.platform == 'darwin':  # macOS
-            font_dirs = ['/System/Library/Fonts', '/Library/Fonts', '~/Library/Fonts']
-        else:  # Linux and others
-            font_dirs = ['/usr/share/fonts/truetype', '/usr/local/share/fonts']
-            
-        # Try to find the specific font with common extensions
-        for font_dir in font_dirs:
-            for ext in ['.ttf', '.ttc', '.otf']:
-                try:
-                    font_path = os.path.join(os.path.expanduser(font_dir), f"{font_family}{ext}")
-                    if os.path.exists(font_path):
-                        return ImageFont.truetype(font_path, font_size)
-                except Exception as e:
-                    print(f"Failed to load font {font_path}: {str(e)}")
-                    continue
+        font_path = find_font(font_family)
+        if font_path:
+            font = load_font(font_path, font_size)
+            if font is not None:
+                return font
 
     # Fall back to default font search if specific font not found or not specified
-    if sys.platform == 'win32':
-        font_dirs = [
-            os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts'),
-            os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Microsoft\\Windows\\Fonts')
-        ]
-        font_files = ['arial.ttf', 'segoeui.ttf', 'calibri.ttf', 'verdana.ttf']
-    elif sys.platform == 'darwin':  # macOS
-        font_dirs = ['/System/Library/Fonts', '/Library/Fonts', '~/Library/Fonts']
-        font_files = ['Helvetica.ttc', 'Arial.ttf', 'Times.ttc']
-    else:  # Linux and others
-        font_dirs = ['/usr/share/fonts/truetype', '/usr/local/share/fonts']
-        font_files = ['DejaVuSans.ttf', 'FreeSans.ttf', 'Ubuntu-R.ttf']
-
-    # Try all combinations of directories and files
-    for font_dir in font_dirs:
-        for font_file in font_files:
-            try:
-                font_path = os.path.join(os.path.expanduser(font_dir), font_file)
-                if os.path.exists(font_path):
-                    return ImageFont.truetype(font_path, font_size)
-            except Exception as e:
-                print(f"Failed to load font {font_path}: {str(e)}")
-                continue
+    for font_file in get_default_font_files():
+        font_path = find_font(font_file)
+        if font_path:
+            font = load_font(font_path, font_size)
+            if font is not None:
+                return font
 
     # Fallback to default PIL font as last resort
     try:
-        return ImageFont.load_default()
+        return load_default_font()
     except Exception as e:
-        print(f"Error loading default font: {str(e)}")
+        logger.error("Error loading default font: %s", e)
         # Create a simple font as absolute fallback
         return None
 
@@ -81,10 +58,151 @@ def ensure_font(font, font_size):
             return ImageFont.load_default()
         except:
             # If all else fails, return None and let the caller handle it
-            print("Warning: Could not load any font. Text rendering may fail.")
+            logger.warning("Could not load any font. Text rendering may fail.")
             return None
     return font
 
+def layout_frame_text(text, width, height, justification, font_size, font_family, layout):
+    """(text, font, align) of one frame: the text wrapped/fitted per `layout`, or None without a font."""
+    load = lambda size: ensure_font(get_system_font(size, font_family), size)
+    if layout not in ("wrap", "fit") or load(font_size) is None:
+        return text, load(font_size), "left"
+    text, font = layout_text(text, width, height, font_size, layout, load)
+    # Wrapped lines are aligned like the block itself
+    return text, font, justification
+
+def per_frame(value, index):
+    """Pick the value for frame `index` when a parameter is given as a per-frame list."""
+    if isinstance(value, list):
+        if not value:
+            return None
+        # Shorter lists wrap around so a 2-entry list alternates over the batch
+        return value[index % len(value)]
+    return value
+
+def list_inputs(*image_names):
+    """Adapt a node function to INPUT_IS_LIST, so per-frame values can come from list outputs upstream.
+
+    ComfyUI then passes every input as a list. When the lists fit one batch (see
+    merge_list_inputs) the node runs once and per_frame() spreads the longer lists
+    over the frames; otherwise it runs once per list item as ComfyUI itself would.
+    Outputs are returned as lists for OUTPUT_IS_LIST. Direct Python calls with
+    plain values are passed through unchanged.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            if not isinstance(bound.arguments.get(image_names[0]), list):
+                return method(*bound.args, **bound.kwargs)
+            merged = merge_list_inputs(bound.arguments, image_names)
+            if merged is None:
+                return map_list_inputs(method, bound.arguments)
+            bound.arguments.update(merged)
+            return tuple([output] for output in method(*bound.args, **bound.kwargs))
+        return wrapper
+    return decorator
+
+def merge_list_inputs(arguments, image_names):
+    """Arguments for a single batched run, or None when the lists don't fit one batch.
+
+    Image lists are concatenated and single-entry lists unwrapped. The batch is
+    extended to the longest per-frame list by repeating its frames, which needs
+    every length to divide that total. Several image batches only merge when
+    they share a size, and with per-frame lists only when each holds one frame
+    (ComfyUI would pair list items with whole batches, not frames).
+    """
+    merged = {}
+    lengths = []
+    for name, value in arguments.items():
+        if isinstance(value, list) and name not in image_names:
+            merged[name] = value[0] if len(value) == 1 else value
+            if len(value) > 1:
+                lengths.append(len(value))
+    for name in image_names:
+        images = arguments.get(name)
+        if not isinstance(images, list) or not images:
+            continue
+        batches = [as_batch(image) for image in images]
+        if len(batches) > 1:
+            if any(batch.shape[1:] != batches[0].shape[1:] for batch in batches):
+                return None
+            if lengths and any(batch.shape[0] != 1 for batch in batches):
+                return None
+        merged[name] = images[0] if len(images) == 1 else torch.cat(batches)
+    image = as_batch(merged[image_names[0]])
+    frames = image.shape[0]
+    total = max([frames] + lengths)
+    if any(total % length for length in [frames] + lengths):
+        return None
+    if total > frames:
+        merged[image_names[0]] = image[torch.arange(total, device=image.device) % frames]
+    return merged
+
+def map_list_inputs(method, arguments):
+    """Run `method` once per list item like ComfyUI's own list mapping, collecting each output into a list.
+
+    Shorter lists repeat their last item.
+    """
+    lists = {name: value for name, value in arguments.items() if isinstance(value, list) and value}
+    results = []
+    for index in range(max(len(value) for value in lists.values())):
+        item = dict(arguments)
+        item.update({name: value[min(index, len(value) - 1)] for name, value in lists.items()})
+        results.append(method(**item))
+    return tuple(list(outputs) for outputs in zip(*results))
+
+def as_batch(image):
+    """View an IMAGE input ([B,H,W,C] tensor or [H,W,C] array) as a [B,H,W,C] tensor without copying."""
+    if not isinstance(image, torch.Tensor):
+        image = torch.from_numpy(np.asarray(image))
+    if image.dim() == 3:
+        image = image.unsqueeze(0)
+    return image.detach()
+
+def image_to_batch(image):
+    """Return a float32 [B,H,W,C] copy of an IMAGE input that can be drawn on in place.
+
+    The copy stays on the input's device: the drawing helpers upload their small
+    CPU-rasterized masks to it, so CUDA frames never round-trip through the host.
+    """
+    return as_batch(image).to(dtype=torch.float32, copy=True)
+
+# Outputs shared by the drawing nodes: the composited image plus the overlay on its own
+OVERLAY_RETURN_TYPES = ("IMAGE", "IMAGE", "MASK", "INT", "INT")
+OVERLAY_RETURN_NAMES = ("image", "layer", "layer_mask", "offset_x", "offset_y")
+OVERLAY_OUTPUT_IS_LIST = (True,) * len(OVERLAY_RETURN_TYPES)  # list_inputs may run once per list item
+OUTPUT_MODES = ["composite", "layer", "both"]
+
+def overlay_outputs(image, draw_fn, frame_params, output_mode):
+    """(overlay, output_mode): the (layer, layer_mask, offset_x, offset_y) outputs, empty unless output_mode asks for them.
+
+    An overlay over the memory budget is left empty and output_mode falls back
+    to "composite", so the drawing still ends up in the image.
+    """
+    if output_mode == "composite" or not frame_params:
+        return empty_overlay(), output_mode
+    batch = as_batch(image)
+    overlay = render_overlay(draw_fn, frame_params, batch.shape[2], batch.shape[1])
+    if overlay is None:
+        return empty_overlay(), "composite"
+    return overlay, output_mode
+
+def draw_per_frame(batch, frame_params, draw_fn):
+    """Call draw_fn(frames, *params) in place on the batch.
+
+    When every frame shares the same parameters the drawing runs once over the
+    whole [B,H,W,C] batch, otherwise once per [H,W,C] frame view.
+    """
+    if all(params == frame_params[0] for params in frame_params):
+        draw_fn(batch, *frame_params[0])
+    else:
+        for i, params in enumerate(frame_params):
+            draw_fn(batch[i], *params)
+    return batch
+
 class AddSingleObjectNode:
     """Node for drawing single shapes on images."""
     
@@ -103,7 +221,9 @@ class AddSingleObjectNode:
                 "show_fill": (["yes", "no"],),
             },
             "optional": {
-                "fill_color": ("COLOR", {"default": "#000000"})
+                "fill_color": ("COLOR", {"default": "#000000"}),
+                "renderer": (["tensor", "pil"], {"default": "tensor"}),
+                "output_mode": (OUTPUT_MODES, {"default": "composite"}),
             },
             "hidden": {
                 "draw_area": "DRAW_AREA",
@@ -111,14 +231,13 @@ class AddSingleObjectNode:
             }
         }
 
-    RETURN_TYPES = ("IMAGE",)
+    RETURN_TYPES = OVERLAY_RETURN_TYPES
+    RETURN_NAMES = OVERLAY_RETURN_NAMES
+    INPUT_IS_LIST = True  # Lists from upstream become per-frame values, see list_inputs
+    OUTPUT_IS_LIST = OVERLAY_OUTPUT_IS_LIST
     FUNCTION = "draw_object"
     CATEGORY = "MisterMR/Drawing"
     
-    @classmethod
-    def IS_CHANGED(cls, **kwargs):
-        return float("nan")
-    
     def hex_to_rgb(self, hex_color):
         """Convert hex color to RGB tuple with better type checking"""
         # First make sure we have a string
@@ -166,14 +285,76 @@ class AddSingleObjectNode:
             # Fallback
             return (255, 255, 255, 255)
 
-    def draw_object(self, image, x, y, width, height, object_type, border_size, border_color, show_fill, draw_area=None, id=None, fill_color=None):
-        # Convert from tensor to PIL Image
-        if isinstance(image, torch.Tensor):
-            image = image.cpu().numpy()
-            image = Image.fromarray((image[0] * 255).astype(np.uint8))
+    @list_inputs("image")
+    def draw_object(self, image, x, y, width, height, object_type, border_size, border_color, show_fill, draw_area=None, id=None, fill_color=None, renderer="tensor", output_mode="composite"):
+        overlay = empty_overlay()
+        if output_mode != "composite":
+            frame_params = self.object_frame_params(as_batch(image).shape[0], x, y, width, height, object_type, border_size, border_color, show_fill, fill_color)
+            overlay, output_mode = overlay_outputs(image, draw_shape, frame_params, output_mode)
+        
+        if output_mode == "layer":
+            # Compositing is deferred to a BlendLayer node: pass the frames through untouched
+            result = as_batch(image)
+        elif renderer == "pil":
+            result = self.draw_object_pil(image, x, y, width, height, object_type, border_size, border_color, show_fill, fill_color)
         else:
-            image = Image.fromarray((image * 255).astype(np.uint8))
-            
+            result = self.draw_object_tensor(image, x, y, width, height, object_type, border_size, border_color, show_fill, fill_color)
+        
+        # Pass the preview image to the drawing area widget
+        if draw_area is not None:
+            preview_image = tensor_to_uint8(result[0])
+            draw_area = {"image": {
+                "width": preview_image.shape[1],
+                "height": preview_image.shape[0],
+                "data": preview_image.tobytes()
+            }}
+        
+        return (result,) + overlay
+
+    def object_frame_params(self, batch_size, x, y, width, height, object_type, border_size, border_color, show_fill, fill_color):
+        """draw_shape parameters of every frame."""
+        frame_params = []
+        for i in range(batch_size):
+            frame_fill = per_frame(fill_color, i)
+            fill_rgba = None
+            if per_frame(show_fill, i) == "yes" and frame_fill is not None:
+                fill_rgba = tuple(self.process_color(frame_fill))
+            frame_params.append((
+                per_frame(x, i), per_frame(y, i),
+                per_frame(width, i), per_frame(height, i),
+                per_frame(object_type, i), per_frame(border_size, i),
+                tuple(self.process_color(per_frame(border_color, i))),
+                fill_rgba
+            ))
+        return frame_params
+
+    def draw_object_tensor(self, image, x, y, width, height, object_type, border_size, border_color, show_fill, fill_color):
+        """Rasterize the shape natively and blend it in place on a copy of the batch."""
+        result = image_to_batch(image)
+        frame_params = self.object_frame_params(result.shape[0], x, y, width, height, object_type, border_size, border_color, show_fill, fill_color)
+        
+        try:
+            draw_per_frame(result, frame_params, draw_shape)
+        except Exception as e:
+            logger.error("Error drawing object: %s", e)
+            return image_to_batch(image)
+        
+        return result
+
+    def draw_object_pil(self, image, x, y, width, height, object_type, border_size, border_color, show_fill, fill_color):
+        """Reference path drawing every frame through PIL ImageDraw."""
+        # Frames go through pooled uint8 buffers into an output on the input's device
+        return map_frames_pil(as_batch(image), lambda i, frame: self.draw_object_frame(
+            frame,
+            per_frame(x, i), per_frame(y, i),
+            per_frame(width, i), per_frame(height, i),
+            per_frame(object_type, i), per_frame(border_size, i),
+            per_frame(border_color, i), per_frame(show_fill, i),
+            per_frame(fill_color, i)
+        ))
+
+    def draw_object_frame(self, image, x, y, width, height, object_type, border_size, border_color, show_fill, fill_color):
+        """Draw the shape on a single PIL frame and return the drawn copy."""
         # Create a copy of the image to draw on
         draw_image = image.copy()
         draw = ImageDraw.Draw(draw_image, 'RGBA')  # Use RGBA mode for alpha support
@@ -203,23 +384,10 @@ class AddSingleObjectNode:
                                     width=border_size,
                                     fill=fill_rgb if show_fill == "yes" else None)
         except Exception as e:
-            print(f"Error drawing object: {str(e)}")
-            return (image,)
-            
-        # Convert to tensor
-        result = np.array(draw_image).astype(np.float32) / 255.0
-        result = torch.from_numpy(result).unsqueeze(0)
+            logger.error("Error drawing object: %s", e)
+            return image
         
-        # Pass the preview image to the drawing area widget
-        if draw_area is not None:
-            preview_image = np.array(draw_image)
-            draw_area = {"image": {
-                "width": preview_image.shape[1],
-                "height": preview_image.shape[0],
-                "data": preview_image.tobytes()
-            }}
-        
-        return (result,)
+        return draw_image
 
 class AddSingleTextNode:
     """Node for drawing text on images."""
@@ -238,10 +406,18 @@ class AddSingleTextNode:
                 "font_size": ("INT", {"default": 32, "min": 8, "max": 256}),
                 "font_family": ("STRING", {"default": "Arial"}),
                 "text_color": ("COLOR", {"default": "#ffffff"}),
+            },
+            "optional": {
+                "render_mode": (["cached", "pil"], {"default": "cached"}),
+                "output_mode": (OUTPUT_MODES, {"default": "composite"}),
+                "layout": (LAYOUT_MODES, {"default": "single_line"}),
             }
         }
 
-    RETURN_TYPES = ("IMAGE",)
+    RETURN_TYPES = OVERLAY_RETURN_TYPES
+    RETURN_NAMES = OVERLAY_RETURN_NAMES
+    INPUT_IS_LIST = True  # Lists from upstream become per-frame values, see list_inputs
+    OUTPUT_IS_LIST = OVERLAY_OUTPUT_IS_LIST
     FUNCTION = "draw_text"
     CATEGORY = "MisterMR/Drawing"
 
@@ -292,27 +468,89 @@ class AddSingleTextNode:
             # Fallback
             return (255, 255, 255, 255)
 
-    def draw_text(self, image, text, x, y, width, height, justification, font_size, font_family, text_color):
-        # Convert from tensor to PIL Image
-        if isinstance(image, torch.Tensor):
-            image = image.cpu().numpy()
-            image = Image.fromarray((image[0] * 255).astype(np.uint8))
+    @list_inputs("image")
+    def draw_text(self, image, text, x, y, width, height, justification, font_size, font_family, text_color, render_mode="cached", output_mode="composite", layout="single_line"):
+        overlay = empty_overlay()
+        if output_mode != "composite":
+            frame_params = self.text_frame_params(as_batch(image).shape[0], text, x, y, width, height, justification, font_size, font_family, text_color, layout)
+            overlay, output_mode = overlay_outputs(image, draw_text_mask, frame_params, output_mode)
+        
+        if output_mode == "layer":
+            # Compositing is deferred to a BlendLayer node: pass the frames through untouched
+            result = as_batch(image)
+        elif render_mode == "pil":
+            result = self.draw_text_pil(image, text, x, y, width, height, justification, font_size, font_family, text_color, layout)
         else:
-            image = Image.fromarray((image * 255).astype(np.uint8))
-            
+            result = self.draw_text_cached(image, text, x, y, width, height, justification, font_size, font_family, text_color, layout)
+        
+        return (result,) + overlay
+
+    def text_frame_params(self, batch_size, text, x, y, width, height, justification, font_size, font_family, text_color, layout="single_line"):
+        """draw_text_mask parameters and font of every frame, or None when no font can be loaded."""
+        frame_params = []
+        for i in range(batch_size):
+            # Layouts are cached, so frames repeating a caption reuse its wrapping and font size
+            frame_text, font, align = layout_frame_text(
+                per_frame(text, i), per_frame(width, i), per_frame(height, i),
+                per_frame(justification, i), per_frame(font_size, i), per_frame(font_family, i),
+                per_frame(layout, i)
+            )
+            if font is None:
+                logger.error("Error drawing text: no font available")
+                return None
+            frame_params.append((
+                frame_text, font,
+                per_frame(x, i), per_frame(y, i),
+                per_frame(width, i), per_frame(height, i),
+                per_frame(justification, i),
+                tuple(self.process_color(per_frame(text_color, i))),
+                align
+            ))
+        return frame_params
+
+    def draw_text_cached(self, image, text, x, y, width, height, justification, font_size, font_family, text_color, layout="single_line"):
+        """Blend cached text masks in place on a copy of the batch."""
+        result = image_to_batch(image)
+        frame_params = self.text_frame_params(result.shape[0], text, x, y, width, height, justification, font_size, font_family, text_color, layout)
+        if frame_params is None:
+            return result
+        
+        try:
+            draw_per_frame(result, frame_params, draw_text_mask)
+        except Exception as e:
+            logger.error("Error drawing text: %s", e)
+            return image_to_batch(image)
+        
+        return result
+
+    def draw_text_pil(self, image, text, x, y, width, height, justification, font_size, font_family, text_color, layout="single_line"):
+        """Reference path laying out and drawing the text on every frame through PIL."""
+        # Frames go through pooled uint8 buffers into an output on the input's device
+        return map_frames_pil(as_batch(image), lambda i, frame: self.draw_text_frame(
+            frame,
+            per_frame(text, i),
+            per_frame(x, i), per_frame(y, i),
+            per_frame(width, i), per_frame(height, i),
+            per_frame(justification, i),
+            per_frame(font_size, i), per_frame(font_family, i),
+            per_frame(text_color, i), per_frame(layout, i)
+        ))
+
+    def draw_text_frame(self, image, text, x, y, width, height, justification, font_size, font_family, text_color, layout="single_line"):
+        """Draw the text on a single PIL frame and return the drawn copy."""
         # Create a copy of the image to draw on
         draw_image = image.copy()
         draw = ImageDraw.Draw(draw_image, 'RGBA')  # Use RGBA mode for alpha support
         
-        # Get font and convert color
-        font = get_system_font(font_size, font_family)
-        font = ensure_font(font, font_size)
+        # Get font (wrapped/fitted text per layout) and convert color
+        text, font, align = layout_frame_text(text, width, height, justification, font_size, font_family, layout)
         text_rgb = self.process_color(text_color)
         
         try:
             # Calculate text alignment
             if font:
-                text_bbox = draw.textbbox((0, 0), text, font=font)
+                with font_lock:  # Frames are drawn in parallel; FreeType objects aren't thread-safe
+                    text_bbox = draw.textbbox((0, 0), text, font=font, align=align)
                 text_width = text_bbox[2] - text_bbox[0]
                 text_height = text_bbox[3] - text_bbox[1]
                 
@@ -327,19 +565,16 @@ class AddSingleTextNode:
                 text_y = y + (height - text_height) // 2
                 
                 # Draw the text
-                draw.text((text_x, text_y), text, fill=text_rgb, font=font)
+                with font_lock:
+                    draw.text((text_x, text_y), text, fill=text_rgb, font=font, align=align)
             else:
                 # Fallback if no font is available - draw simple text without font
                 draw.text((x, y), text + " (font error)", fill=text_rgb)
         except Exception as e:
-            print(f"Error drawing text: {str(e)}")
-            return (image,)
+            logger.error("Error drawing text: %s", e)
+            return image
         
-        # Convert back to tensor
-        result = np.array(draw_image).astype(np.float32) / 255.0
-        result = torch.from_numpy(result).unsqueeze(0)
-        
-        return (result,)
+        return draw_image
 
 class ColorNode:
     """Node for creating RGBA colors to use with other MisterMR nodes."""
@@ -397,76 +632,46 @@ class AddLogoNode:
                 "height": ("INT", {"default": 100, "min": 1, "max": 10000}),
                 "preserve_aspect_ratio": (["yes", "no"],),
                 "opacity": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 1.0, "step": 0.01}),
+            },
+            "optional": {
+                "output_mode": (OUTPUT_MODES, {"default": "composite"}),
             }
         }
 
-    RETURN_TYPES = ("IMAGE",)
+    RETURN_TYPES = OVERLAY_RETURN_TYPES
+    RETURN_NAMES = OVERLAY_RETURN_NAMES
+    INPUT_IS_LIST = True  # Lists from upstream become per-frame values, see list_inputs
+    OUTPUT_IS_LIST = OVERLAY_OUTPUT_IS_LIST
     FUNCTION = "add_logo"
     CATEGORY = "MisterMR/Drawing"
     
-    def add_logo(self, image, logo, x, y, width, height, preserve_aspect_ratio, opacity):
-        # Convert from tensor to PIL Image
-        if isinstance(image, torch.Tensor):
-            image = image.cpu().numpy()
-            image = Image.fromarray((image[0] * 255).astype(np.uint8))
-        else:
-            image = Image.fromarray((image * 255).astype(np.uint8))
-            
-        if isinstance(logo, torch.Tensor):
-            logo = logo.cpu().numpy()
-            logo = Image.fromarray((logo[0] * 255).astype(np.uint8))
-        else:
-            logo = Image.fromarray((logo * 255).astype(np.uint8))
-        
-        # Create a copy of the image to draw on
-        result_image = image.copy()
-        
-        # Resize the logo
-        original_width, original_height = logo.size
-        new_width, new_height = width, height
-        
-        if preserve_aspect_ratio == "yes":
-            # Calculate the aspect ratio of the original logo
-            aspect_ratio = original_width / original_height
-            
-            # Adjust dimensions to preserve aspect ratio
-            if width / height > aspect_ratio:
-                # Width is too large for the given height
-                new_width = int(height * aspect_ratio)
-            else:
-                # Height is too large for the given width
-                new_height = int(width / aspect_ratio)
-        
-        # Resize the logo
-        resized_logo = logo.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        # If logo doesn't have alpha channel, add one
-        if resized_logo.mode != 'RGBA':
-            resized_logo = resized_logo.convert('RGBA')
-            
-        # Apply opacity if needed
-        if opacity < 1.0:
-            # Create a copy of the logo with modified alpha channel
-            data = np.array(resized_logo)
-            # Apply opacity to the alpha channel (if exists)
-            if data.shape[2] >= 4:
-                data[:, :, 3] = data[:, :, 3] * opacity
-            # Convert back to image
-            resized_logo = Image.fromarray(data)
+    @list_inputs("image", "logo")
+    def add_logo(self, image, logo, x, y, width, height, preserve_aspect_ratio, opacity, output_mode="composite"):
+        frame_params = self.logo_frame_params(as_batch(image).shape[0], logo, x, y, width, height, preserve_aspect_ratio, opacity)
+        overlay, output_mode = overlay_outputs(image, draw_logo_layer, frame_params, output_mode)
+        if output_mode == "layer":
+            # Compositing is deferred to a BlendLayer node: pass the frames through untouched
+            return (as_batch(image),) + overlay
         
+        result = image_to_batch(image)
         try:
-            # Paste the logo onto the image
-            if resized_logo.mode == 'RGBA':
-                result_image.paste(resized_logo, (x, y), resized_logo)
-            else:
-                result_image.paste(resized_logo, (x, y))
+            # Blend the logo in place over just its target region
+            draw_per_frame(result, frame_params, draw_logo_layer)
         except Exception as e:
-            print(f"Error adding logo: {str(e)}")
-            return (image,)
-        
-        # Convert back to tensor
-        result = np.array(result_image).astype(np.float32) / 255.0
-        result = torch.from_numpy(result).unsqueeze(0)
+            logger.error("Error adding logo: %s", e)
+            return (image_to_batch(image),) + overlay
         
-        return (result,)
+        return (result,) + overlay
 
+    def logo_frame_params(self, batch_size, logo, x, y, width, height, preserve_aspect_ratio, opacity):
+        """Resolve the (cached) resized logo layer and position of every frame."""
+        logo_batch = as_batch(logo)
+        frame_args = [(
+            i % logo_batch.shape[0],  # A single logo is reused for every frame
+            per_frame(width, i), per_frame(height, i),
+            per_frame(preserve_aspect_ratio, i),
+            per_frame(opacity, i)
+        ) for i in range(batch_size)]
+        # Distinct resizes run in parallel on the frame pool
+        layers = get_logo_layers(logo_batch, frame_args)
+        return [(layer, per_frame(x, i), per_frame(y, i)) for i, layer in enumerate(layers)]
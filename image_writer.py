@@ -0,0 +1,96 @@
+"""Background writer pool used by SaveImageAndTextNode.
+
+PNG encoding releases the GIL inside zlib, so a small thread pool is enough
+to take compression and file writes off the executor thread. The queue is
+bounded: once MISTERMR_WRITER_QUEUE jobs are pending, submit() blocks until a
+worker frees a slot, which keeps memory bounded when sampling outruns the
+disk. Failures are collected and handed back to the next execution through
+pop_errors(). flush() waits for every pending write and runs at exit.
+"""
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class BackgroundWriter:
+    """Thread pool with a bounded queue and deferred error reporting."""
+
+    def __init__(self, max_workers=None, max_pending=None):
+        if max_workers is None:
+            max_workers = int(os.environ.get("MISTERMR_WRITER_THREADS", min(4, os.cpu_count() or 1)))
+        if max_pending is None:
+            max_pending = int(os.environ.get("MISTERMR_WRITER_QUEUE", "64"))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="mrm-writer")
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._errors = []
+
+    def submit(self, description, fn, *args):
+        """Queue fn(*args), blocking while the queue is full. `description` names the job in errors."""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._run, description, fn, args)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _run(self, description, fn, args):
+        try:
+            fn(*args)
+        except Exception as e:
+            with self._lock:
+                self._errors.append(f"{description}: {str(e)}")
+        finally:
+            self._slots.release()
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def flush(self, timeout=None):
+        """Wait until every job queued so far has finished. Returns True if none is left pending."""
+        with self._lock:
+            pending = list(self._pending)
+        if not pending:
+            return True
+        _done, not_done = wait(pending, timeout=timeout)
+        return not not_done
+
+    def pop_errors(self):
+        """Return and clear the errors collected since the last call."""
+        with self._lock:
+            errors, self._errors = self._errors, []
+        return errors
+
+    def shutdown(self):
+        """Flush pending writes and stop the worker threads."""
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Shared process-wide writer, created on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = BackgroundWriter()
+                atexit.register(_writer.shutdown)
+    return _writer
+
+
+def flush_writes(timeout=None):
+    """Barrier: wait for all background writes queued so far."""
+    if _writer is None:
+        return True
+    return _writer.flush(timeout)
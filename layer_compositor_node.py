@@ -0,0 +1,224 @@
+"""Layered compositor: many shapes, texts and images drawn in a single pass.
+
+The layers come as a JSON list. Each layer's bounding box is resolved first
+(text is measured through the text mask cache, images through the logo layer
+cache), and the union of those boxes is the only region of the working
+buffer that gets touched. The input is copied once, every layer is blended
+in place inside the dirty region in list order, and the result is returned.
+
+BlendLayerNode composites the layer/mask outputs of the drawing nodes later,
+on whatever device the frames are on.
+"""
+import json
+
+import torch
+
+from .compositing import blend_layer
+from .image_text_nodes import (
+    AddSingleObjectNode, OUTPUT_MODES, OVERLAY_RETURN_NAMES, OVERLAY_RETURN_TYPES,
+    as_batch, draw_per_frame, image_to_batch, layout_frame_text
+)
+from .logging_utils import get_logger
+from .logo_cache import draw_logo_layer, get_logo_layers
+from .overlay_layers import (
+    empty_overlay, frame_regions, overlay_fits, shift_params, split_premultiplied, union_rect
+)
+from .shape_rasterizer import draw_shape
+from .text_atlas import draw_text_mask
+
+logger = get_logger("layer_compositor")
+
+IMAGE_SOURCES = ("image_1", "image_2", "image_3", "image_4")
+
+EXAMPLE_LAYERS = """[
+  {"type": "shape", "shape": "round_rect", "x": 40, "y": 40, "width": 440, "height": 120,
+   "border_size": 0, "border_color": "#000000", "fill_color": [0, 0, 0, 160]},
+  {"type": "text", "text": "Title", "x": 40, "y": 40, "width": 440, "height": 120,
+   "justification": "center", "font_size": 64, "font_family": "default", "color": "#ffffff"}
+]"""
+
+
+class LayerCompositorNode:
+    """Node drawing a list of shape, text and image layers onto an image in one pass."""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "image": ("IMAGE",),
+                "layers": ("STRING", {"default": EXAMPLE_LAYERS, "multiline": True}),
+            },
+            "optional": {
+                "image_1": ("IMAGE",),
+                "image_2": ("IMAGE",),
+                "image_3": ("IMAGE",),
+                "image_4": ("IMAGE",),
+                "output_mode": (OUTPUT_MODES, {"default": "composite"}),
+            }
+        }
+
+    RETURN_TYPES = OVERLAY_RETURN_TYPES
+    RETURN_NAMES = OVERLAY_RETURN_NAMES
+    FUNCTION = "composite"
+    CATEGORY = "MisterMR/Drawing"
+
+    # Same color handling as the single-element drawing nodes
+    hex_to_rgb = AddSingleObjectNode.hex_to_rgb
+    process_color = AddSingleObjectNode.process_color
+
+    def layer_color(self, color, default="#ffffff"):
+        """RGBA tuple from a hex string, a ColorNode dict or an [r, g, b(, a)] list."""
+        if color is None:
+            color = default
+        if isinstance(color, (list, tuple)) and len(color) in (3, 4):
+            return tuple(int(c) for c in color) + ((255,) if len(color) == 3 else ())
+        return tuple(self.process_color(color))
+
+    def parse_layers(self, layers):
+        """Parse the layers JSON into a list of dicts, skipping invalid and hidden entries."""
+        try:
+            parsed = json.loads(layers) if isinstance(layers, str) else layers
+        except json.JSONDecodeError as e:
+            logger.error("Invalid layers JSON: %s", e)
+            return []
+        if isinstance(parsed, dict):
+            parsed = [parsed]
+        if not isinstance(parsed, list):
+            logger.error("Layers must be a JSON list of objects")
+            return []
+        return [layer for layer in parsed if isinstance(layer, dict) and layer.get("visible", True)]
+
+    def resolve_layer(self, layer, batch_size, sources):
+        """Turn a layer spec into (draw_fn, per-frame params), or None if it can't be drawn."""
+        layer_type = layer.get("type", "shape")
+        x = int(layer.get("x", 0))
+        y = int(layer.get("y", 0))
+        width = max(1, int(layer.get("width", 100)))
+        height = max(1, int(layer.get("height", 100)))
+
+        if layer_type == "shape":
+            fill = layer.get("fill_color")
+            params = (x, y, width, height, layer.get("shape", "rect"), int(layer.get("border_size", 2)),
+                      self.layer_color(layer.get("border_color")),
+                      self.layer_color(fill) if fill is not None else None)
+            return draw_shape, [params]
+
+        if layer_type == "text":
+            justification = layer.get("justification", "left")
+            text, font, align = layout_frame_text(
+                str(layer.get("text", "")), width, height, justification,
+                int(layer.get("font_size", 32)), layer.get("font_family", "default"), layer.get("layout", "single_line")
+            )
+            if font is None:
+                logger.error("Skipping text layer %r: no font available", text)
+                return None
+            params = (text, font, x, y, width, height, justification, self.layer_color(layer.get("color")), align)
+            return draw_text_mask, [params]
+
+        if layer_type == "image":
+            source = sources.get(layer.get("source", "image_1"))
+            if source is None:
+                logger.error("Skipping image layer: input %r is not connected", layer.get("source", "image_1"))
+                return None
+            source = as_batch(source)
+            preserve = "yes" if layer.get("preserve_aspect_ratio", True) not in (False, "no") else "no"
+            opacity = float(layer.get("opacity", 1.0))
+            # Source frames pair with image frames, a single frame is reused for all of them
+            layers = get_logo_layers(source, [(i, width, height, preserve, opacity)
+                                              for i in range(min(batch_size, source.shape[0]))])
+            params = [(layer, x, y) for layer in layers]
+            return draw_logo_layer, params
+
+        logger.error("Skipping layer of unknown type %r", layer_type)
+        return None
+
+    def composite(self, image, layers, image_1=None, image_2=None, image_3=None, image_4=None, output_mode="composite"):
+        sources = dict(zip(IMAGE_SOURCES, (image_1, image_2, image_3, image_4)))
+        batch = as_batch(image)
+        batch_size, image_height, image_width = batch.shape[0], batch.shape[1], batch.shape[2]
+
+        # Resolve every layer and its clipped bounding box before touching any pixels
+        resolved = []
+        dirty = []
+        for layer in self.parse_layers(layers):
+            try:
+                entry = self.resolve_layer(layer, batch_size, sources)
+                if entry is None:
+                    continue
+                draw_fn, params = entry
+                regions = frame_regions(draw_fn, params, image_width, image_height)
+            except (TypeError, ValueError) as e:
+                logger.error("Skipping invalid layer %r: %s", layer, e)
+                continue
+            if all(region is None for region in regions):
+                continue  # Entirely outside the image
+            dirty.extend(regions)
+            # Frame i gets params[i % len(params)]
+            params = [params[i % len(params)] for i in range(batch_size)] if len(params) > 1 else params
+            resolved.append((draw_fn, params))
+
+        dirty_rect = union_rect(dirty)
+        if dirty_rect is None:
+            passthrough = batch if output_mode == "layer" else image_to_batch(image)
+            return (passthrough,) + empty_overlay()
+        x0, y0, x1, y1 = dirty_rect
+        logger.debug("Compositing %d layers inside dirty rect %s", len(resolved), dirty_rect)
+
+        overlay = empty_overlay()
+        layer_count = max(len(params) for _, params in resolved)
+        if output_mode != "composite" and overlay_fits(layer_count, dirty_rect):
+            # All layers on one transparent buffer the size of the dirty rect
+            buffer = torch.zeros(layer_count, y1 - y0, x1 - x0, 4)
+            self.draw_layers(buffer, resolved, x0, y0)
+            overlay = split_premultiplied(buffer) + (x0, y0)
+            if output_mode == "layer":
+                return (batch,) + overlay
+
+        # One copy of the input; the layers only ever write inside the dirty rect
+        result = image_to_batch(image)
+        self.draw_layers(result[:, y0:y1, x0:x1, :], resolved, x0, y0)
+        return (result,) + overlay
+
+    def draw_layers(self, region, resolved, x0, y0):
+        """Draw the resolved layers in order onto `region`, whose origin is (x0, y0) in image coordinates."""
+        frame_count = region.shape[0]
+        for draw_fn, params in resolved:
+            shifted = [shift_params(draw_fn, frame_params, x0, y0) for frame_params in params]
+            try:
+                draw_per_frame(region, [shifted[i % len(shifted)] for i in range(frame_count)], draw_fn)
+            except Exception as e:
+                logger.error("Error drawing layer: %s", e)
+
+
+class BlendLayerNode:
+    """Node compositing a layer/mask pair from the drawing nodes onto an image batch."""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "image": ("IMAGE",),
+                "layer": ("IMAGE",),
+                "layer_mask": ("MASK",),
+                "offset_x": ("INT", {"default": 0, "min": -10000, "max": 10000}),
+                "offset_y": ("INT", {"default": 0, "min": -10000, "max": 10000}),
+            },
+            "optional": {
+                "opacity": ("FLOAT", {"default": 1.0, "min": 0.0, "max": 1.0, "step": 0.01}),
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE",)
+    FUNCTION = "blend"
+    CATEGORY = "MisterMR/Drawing"
+
+    def blend(self, image, layer, layer_mask, offset_x, offset_y, opacity=1.0):
+        # Stays on the image's device: the layer is small and moves to the frames, not the other way round
+        result = as_batch(image).to(dtype=torch.float32, copy=True)
+        alpha = layer_mask if opacity >= 1.0 else layer_mask * opacity
+        try:
+            blend_layer(result, offset_x, offset_y, as_batch(layer), alpha)
+        except Exception as e:
+            logger.error("Error blending layer: %s", e)
+            return (as_batch(image).to(dtype=torch.float32, copy=True),)
+        return (result,)
@@ -1,9 +1,14 @@
 from datetime import datetime
 
+from .logging_utils import RateLimiter, get_message_logger
+
 
 class LogNode:
     """Node for logging messages with timestamp to ComfyUI console."""
-    
+
+    # Shared across instances so the limit holds per node id, not per object
+    rate_limiter = RateLimiter()
+
     @classmethod
     def INPUT_TYPES(cls):
         return {
@@ -12,21 +17,36 @@ class LogNode:
             },
             "optional": {
                 "any_input": ("*",),
+                "output_format": (["text", "jsonl"], {"default": "text"}),
+                "rate_limit": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 1000.0, "step": 0.1}),
+            },
+            "hidden": {
+                "unique_id": "UNIQUE_ID"
             }
         }
 
     RETURN_TYPES = ("*",)
     FUNCTION = "log_message"
     CATEGORY = "MisterMR/Utils"
-    
-    def log_message(self, text, any_input=None):
+
+    def log_message(self, text, any_input=None, output_format="text", rate_limit=0.0, unique_id=None):
         """Log message with timestamp and return the input unchanged."""
-        # Format datetime as yyyy-MM-dd hh.mm.ss.fff
-        timestamp = datetime.now().strftime("%Y-%m-%d %H.%M.%S.%f")[:-3]  # Remove last 3 digits to get milliseconds
-        
-        # Log to ComfyUI console
-        log_message = f"{timestamp} - {text}"
-        print(log_message)
-        
+        # Drop messages above rate_limit per second (0 = unlimited)
+        allowed, suppressed = LogNode.rate_limiter.allow(unique_id, rate_limit)
+        if not allowed:
+            return (any_input,)
+
+        logger = get_message_logger(output_format)
+        if output_format == "jsonl":
+            # The JSON formatter adds its own timestamp
+            logger.info("%s", text, extra={"fields": {"node": unique_id, "suppressed": suppressed}})
+        else:
+            # Format datetime as yyyy-MM-dd hh.mm.ss.fff
+            timestamp = datetime.now().strftime("%Y-%m-%d %H.%M.%S.%f")[:-3]  # Remove last 3 digits to get milliseconds
+            if suppressed:
+                logger.info("%s - %s (%d messages suppressed)", timestamp, text, suppressed)
+            else:
+                logger.info("%s - %s", timestamp, text)
+
         # Return the input unchanged (passthrough)
         return (any_input,)
@@ -0,0 +1,111 @@
+"""Package-wide logging for the MisterMR nodes.
+
+Every module logs through a child of the "MisterMR" logger with lazy %-style
+formatting, so disabled messages cost a level check and nothing else. The
+level comes from MISTERMR_LOG_LEVEL (default WARNING: debug and info chatter
+stays silent, problems are still reported) and records propagate to
+ComfyUI's own handlers.
+
+LogNode messages are the exception: they are the node's output, so they go
+to a dedicated "MisterMR.log" logger with its own stdout handler, optionally
+formatted as JSON lines and rate limited.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+PACKAGE_LOGGER = "MisterMR"
+
+_package_logger = logging.getLogger(PACKAGE_LOGGER)
+
+
+def _env_log_level():
+    """MISTERMR_LOG_LEVEL as a logging level; an unknown value falls back to WARNING instead of failing the import."""
+    value = os.environ.get("MISTERMR_LOG_LEVEL", "").strip().upper() or "WARNING"
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value)
+    if isinstance(level, int):
+        return level
+    _package_logger.warning("Unknown MISTERMR_LOG_LEVEL %r, using WARNING", value)
+    return logging.WARNING
+
+
+_package_logger.setLevel(_env_log_level())
+
+
+def get_logger(name=None):
+    """Logger for a module of the package, e.g. get_logger("prompt_selector")."""
+    if not name:
+        return _package_logger
+    return logging.getLogger(f"{PACKAGE_LOGGER}.{name}")
+
+
+def set_log_level(level):
+    """Change the level of every package logger at runtime ("DEBUG", logging.INFO, ...)."""
+    if isinstance(level, str):
+        level = level.upper()
+    _package_logger.setLevel(level)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record, with any `fields` passed through `extra`."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        return json.dumps(entry, default=str)
+
+
+class RateLimiter:
+    """Token bucket per key: at most `rate` events per second, with bursts of up to `burst`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}  # key -> [tokens, last_time, suppressed]
+
+    def allow(self, key, rate, burst=None):
+        """Return (allowed, suppressed_since_last_allowed). A rate of 0 or less disables limiting."""
+        if rate <= 0:
+            return True, 0
+        burst = burst or max(1.0, rate)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(key, [burst, now, 0])
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False, 0
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = bucket[2], 0
+            return True, suppressed
+
+
+_message_lock = threading.Lock()
+
+
+def get_message_logger(output_format="text"):
+    """Logger used by LogNode, writing to stdout as plain text or JSON lines."""
+    output_format = "jsonl" if output_format == "jsonl" else "text"
+    logger = logging.getLogger(f"{PACKAGE_LOGGER}.log.{output_format}")
+    with _message_lock:
+        if not logger.handlers:
+            handler = logging.StreamHandler(sys.stdout)
+            if output_format == "jsonl":
+                handler.setFormatter(JsonLinesFormatter())
+            else:
+                handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            # LogNode output is the point of the node, so it ignores the package level
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+    return logger
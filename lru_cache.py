@@ -0,0 +1,70 @@
+"""Small thread-safe LRU cache behind the package's font, text, logo, shape and template caches.
+
+Each cache has a default capacity that an environment variable can override,
+e.g. MISTERMR_LOGO_CACHE_SIZE; set_capacity() changes it at runtime. The
+capacity counts entries, or whatever `weigh(value)` returns (such as bytes)
+when a weigh function is given.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Mapping that drops its least recently used entries beyond `capacity`."""
+
+    def __init__(self, capacity, env_var=None, weigh=None):
+        if env_var:
+            capacity = os.environ.get(env_var, capacity)
+        self.capacity = max(1, int(capacity))
+        self._weigh = weigh or (lambda value: 1)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, weight)
+        self._total = 0
+
+    def get(self, key):
+        """The cached value, marked as recently used, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        weight = self._weigh(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total -= old[1]
+            if weight > self.capacity:
+                return  # Would evict everything else and still not fit
+            self._entries[key] = (value, weight)
+            self._total += weight
+            self._evict()
+
+    def get_or_create(self, key, create):
+        """Cached value for `key`, calling create() outside the lock on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = create()
+            self.put(key, value)
+        return value
+
+    def set_capacity(self, capacity):
+        with self._lock:
+            self.capacity = max(1, int(capacity))
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        while self._total > self.capacity:
+            _key, (_value, weight) = self._entries.popitem(last=False)
+            self._total -= weight
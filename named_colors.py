@@ -0,0 +1,97 @@
+"""Built-in table of common color names, so color lookup doesn't need matplotlib.
+
+Covers the CSS basic and most commonly used extended names plus matplotlib's
+single-letter shorthands. Names outside the table fall back to matplotlib
+when it happens to be installed; it is only imported on that first miss.
+"""
+NAMED_COLORS = {
+    "black": (0, 0, 0),
+    "white": (255, 255, 255),
+    "red": (255, 0, 0),
+    "lime": (0, 255, 0),
+    "green": (0, 128, 0),
+    "blue": (0, 0, 255),
+    "yellow": (255, 255, 0),
+    "cyan": (0, 255, 255),
+    "aqua": (0, 255, 255),
+    "magenta": (255, 0, 255),
+    "fuchsia": (255, 0, 255),
+    "silver": (192, 192, 192),
+    "gray": (128, 128, 128),
+    "grey": (128, 128, 128),
+    "darkgray": (169, 169, 169),
+    "darkgrey": (169, 169, 169),
+    "lightgray": (211, 211, 211),
+    "lightgrey": (211, 211, 211),
+    "dimgray": (105, 105, 105),
+    "maroon": (128, 0, 0),
+    "darkred": (139, 0, 0),
+    "olive": (128, 128, 0),
+    "navy": (0, 0, 128),
+    "darkblue": (0, 0, 139),
+    "purple": (128, 0, 128),
+    "teal": (0, 128, 128),
+    "orange": (255, 165, 0),
+    "darkorange": (255, 140, 0),
+    "gold": (255, 215, 0),
+    "pink": (255, 192, 203),
+    "hotpink": (255, 105, 180),
+    "brown": (165, 42, 42),
+    "chocolate": (210, 105, 30),
+    "tan": (210, 180, 140),
+    "beige": (245, 245, 220),
+    "ivory": (255, 255, 240),
+    "khaki": (240, 230, 140),
+    "coral": (255, 127, 80),
+    "salmon": (250, 128, 114),
+    "tomato": (255, 99, 71),
+    "crimson": (220, 20, 60),
+    "violet": (238, 130, 238),
+    "indigo": (75, 0, 130),
+    "lavender": (230, 230, 250),
+    "turquoise": (64, 224, 208),
+    "skyblue": (135, 206, 235),
+    "lightblue": (173, 216, 230),
+    "steelblue": (70, 130, 180),
+    "royalblue": (65, 105, 225),
+    "darkgreen": (0, 100, 0),
+    "lightgreen": (144, 238, 144),
+    "forestgreen": (34, 139, 34),
+    "limegreen": (50, 205, 50),
+    "seagreen": (46, 139, 87),
+    "transparent": (0, 0, 0),
+    # matplotlib single-letter shorthands
+    "k": (0, 0, 0),
+    "w": (255, 255, 255),
+    "r": (255, 0, 0),
+    "g": (0, 128, 0),
+    "b": (0, 0, 255),
+    "y": (191, 191, 0),
+    "c": (0, 191, 191),
+    "m": (191, 0, 191),
+}
+
+
+def lookup_color(name):
+    """RGB tuple (0-255) for a color name or #RRGGBB string, or None if unknown."""
+    if not isinstance(name, str):
+        return None
+    key = name.strip().lower().replace(" ", "")
+    if key in NAMED_COLORS:
+        return NAMED_COLORS[key]
+
+    hex_value = key.lstrip('#')
+    if key.startswith('#') and len(hex_value) in (6, 8):
+        try:
+            return tuple(int(hex_value[i:i + 2], 16) for i in (0, 2, 4))
+        except ValueError:
+            return None
+
+    try:
+        import matplotlib.colors as mcolors  # Only for names outside the table
+    except ImportError:
+        return None
+    try:
+        return tuple(int(x * 255) for x in mcolors.to_rgb(name))
+    except ValueError:
+        return None
@@ -0,0 +1,124 @@
+"""Overlay layers: drawing calls rendered onto a small transparent buffer.
+
+The shape, text and logo draw functions all blend in place at an (x, y)
+position. Here their bounding boxes are resolved, the calls are shifted into
+the coordinates of the union of those boxes, and they are drawn onto a zeroed
+RGBA buffer of just that size. Blending onto a zero, fully transparent buffer
+leaves premultiplied color in RGB and coverage in alpha; the result is split
+into a straight-color IMAGE and a MASK so it can be composited later, once,
+with blend_layer wherever the frames live.
+
+Frames with differing parameters (a caption moving across the frame) each get
+their own layer over the whole union rect, so the buffer is capped at
+MISTERMR_OVERLAY_MAX_MB (default 512); larger overlays fall back to compositing.
+"""
+import os
+
+import torch
+
+from .compositing import clip_region
+from .logging_utils import get_logger
+from .logo_cache import draw_logo_layer
+from .text_atlas import draw_text_mask, get_text_mask, text_mask_origin
+
+
+logger = get_logger("overlay")
+
+OVERLAY_BUDGET_BYTES = int(os.environ.get("MISTERMR_OVERLAY_MAX_MB", "512")) * 2 ** 20
+
+
+def overlay_fits(layer_count, rect):
+    """Whether an [L,h,w] overlay over `rect` stays within the byte budget.
+
+    Counts the float32 RGBA buffer plus the color and alpha it is split into.
+    """
+    x0, y0, x1, y1 = rect
+    needed = layer_count * (y1 - y0) * (x1 - x0) * (4 + 3 + 1) * 4
+    if needed <= OVERLAY_BUDGET_BYTES:
+        return True
+    logger.warning("Overlay layer of %d x %dx%d needs %.0f MB, over the %.0f MB budget "
+                   "(MISTERMR_OVERLAY_MAX_MB); compositing instead",
+                   layer_count, x1 - x0, y1 - y0, needed / 2 ** 20, OVERLAY_BUDGET_BYTES / 2 ** 20)
+    return False
+
+
+def union_rect(rects):
+    """Smallest (x0, y0, x1, y1) containing every rect, or None when there are none."""
+    rects = [rect for rect in rects if rect is not None]
+    if not rects:
+        return None
+    return (min(r[0] for r in rects), min(r[1] for r in rects),
+            max(r[2] for r in rects), max(r[3] for r in rects))
+
+
+def draw_bbox(draw_fn, params):
+    """(x, y, width, height) of the pixels a draw call can touch."""
+    if draw_fn is draw_logo_layer:
+        layer, x, y = params
+        return x, y, layer.width, layer.height
+    if draw_fn is draw_text_mask:
+        text, font, x, y, width, height, justification = params[:7]
+        text_mask = get_text_mask(text, font, params[8] if len(params) > 8 else "left")
+        mask_x, mask_y = text_mask_origin(text_mask, x, y, width, height, justification)
+        return mask_x, mask_y, text_mask.text_width, text_mask.text_height
+    # draw_shape: the rasterized shape covers width + 1 by height + 1 pixels, like ImageDraw
+    x, y, width, height = params[:4]
+    return x, y, width + 1, height + 1
+
+
+def shift_params(draw_fn, params, dx, dy):
+    """Offset the (x, y) of a draw call's parameters by (-dx, -dy)."""
+    if draw_fn is draw_logo_layer:
+        layer, x, y = params
+        return (layer, x - dx, y - dy)
+    if draw_fn is draw_text_mask:
+        return (params[0], params[1], params[2] - dx, params[3] - dy) + tuple(params[4:])
+    return (params[0] - dx, params[1] - dy) + tuple(params[2:])
+
+
+def frame_regions(draw_fn, frame_params, image_width, image_height):
+    """Clipped (x0, y0, x1, y1) of every draw call, None for calls entirely outside the image."""
+    regions = []
+    for params in frame_params:
+        region = clip_region(*draw_bbox(draw_fn, params), image_width, image_height)
+        regions.append(region[:4] if region is not None else None)
+    return regions
+
+
+def empty_overlay():
+    """A 1x1 fully transparent layer at (0, 0)."""
+    return torch.zeros(1, 1, 1, 3), torch.zeros(1, 1, 1), 0, 0
+
+
+def render_overlay(draw_fn, frame_params, image_width, image_height):
+    """Draw per-frame calls onto a transparent buffer cropped to their union.
+
+    Returns (color [L,h,w,3], alpha [L,h,w], offset_x, offset_y); L is 1 when
+    every frame shares the same parameters, otherwise one layer per frame.
+    Returns None when the layers would exceed the overlay budget.
+    """
+    if all(params == frame_params[0] for params in frame_params):
+        frame_params = frame_params[:1]
+
+    rect = union_rect(frame_regions(draw_fn, frame_params, image_width, image_height))
+    if rect is None:
+        return empty_overlay()
+    if not overlay_fits(len(frame_params), rect):
+        return None
+    x0, y0, x1, y1 = rect
+
+    buffer = torch.zeros(len(frame_params), y1 - y0, x1 - x0, 4)
+    for i, params in enumerate(frame_params):
+        draw_fn(buffer[i], *shift_params(draw_fn, params, x0, y0))
+
+    color, alpha = split_premultiplied(buffer)
+    return color, alpha, x0, y0
+
+
+def split_premultiplied(buffer):
+    """Split an [L,h,w,4] premultiplied buffer into straight color [L,h,w,3] and alpha [L,h,w]."""
+    alpha = buffer[..., 3]
+    # Un-premultiply, leaving fully transparent pixels black
+    color = torch.where(alpha.unsqueeze(-1) > 0, buffer[..., :3] / alpha.clamp_min(1e-6).unsqueeze(-1),
+                        torch.zeros(()))
+    return color.clamp_(0.0, 1.0), alpha.contiguous()
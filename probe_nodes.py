@@ -0,0 +1,269 @@
+"""Start/end probe nodes that time sub-graphs of a workflow.
+
+Put a ProbeStart in front of a sub-graph and a ProbeEnd with the same label
+after it, routing a value through both so ComfyUI runs them in order. Each
+end probe records the wall time since its start probe, a description of the
+passthrough value (tensor shape, dtype, device, bytes) and the process RSS
+and CUDA memory. Samples are aggregated per label into latency histograms,
+served at GET /mrm/probes (JSON) and /mrm/probes.csv, reset with POST
+/mrm/probes/reset, and optionally dumped to a CSV file by the end probe.
+"""
+import bisect
+import csv
+import io
+import os
+import threading
+import time
+from collections import deque
+
+import torch
+
+from .logging_utils import get_logger
+from .server_utils import get_prompt_server, register_routes
+
+logger = get_logger("probes")
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000, float("inf"))
+
+
+def describe_value(value):
+    """Shape, dtype, device and byte size of the tensors inside a passthrough value."""
+    tensors = []
+
+    def collect(item, depth=0):
+        if depth > 4:
+            return
+        if isinstance(item, torch.Tensor):
+            tensors.append(item)
+        elif isinstance(item, dict):
+            for entry in item.values():
+                collect(entry, depth + 1)
+        elif isinstance(item, (list, tuple)):
+            for entry in item:
+                collect(entry, depth + 1)
+
+    collect(value)
+    if not tensors:
+        return {"type": type(value).__name__}
+
+    first = tensors[0]
+    return {
+        "type": type(value).__name__,
+        "shape": list(first.shape),
+        "dtype": str(first.dtype).replace("torch.", ""),
+        "device": str(first.device),
+        "tensors": len(tensors),
+        "bytes": sum(tensor.numel() * tensor.element_size() for tensor in tensors),
+    }
+
+
+def memory_snapshot():
+    """Process RSS and CUDA memory in bytes, when they can be measured."""
+    snapshot = {}
+    try:
+        import psutil
+        snapshot["rss_bytes"] = psutil.Process(os.getpid()).memory_info().rss
+    except Exception:
+        pass
+    if torch.cuda.is_available():
+        snapshot["cuda_allocated_bytes"] = torch.cuda.memory_allocated()
+        snapshot["cuda_max_allocated_bytes"] = torch.cuda.max_memory_allocated()
+    return snapshot
+
+
+class ProbeStats:
+    """Latency histogram and summary of one probe label."""
+
+    def __init__(self, max_recent=1000):
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = None
+        self.buckets = [0] * len(BUCKET_BOUNDS_MS)
+        self.recent_ms = deque(maxlen=max_recent)  # For percentiles
+        self.last = {}
+
+    def add(self, elapsed_ms, details):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.min_ms = elapsed_ms if self.min_ms is None else min(self.min_ms, elapsed_ms)
+        self.max_ms = elapsed_ms if self.max_ms is None else max(self.max_ms, elapsed_ms)
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+        self.recent_ms.append(elapsed_ms)
+        self.last = details
+
+    def percentile(self, fraction):
+        if not self.recent_ms:
+            return None
+        ordered = sorted(self.recent_ms)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "min_ms": self.min_ms,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(0.50),
+            "p90_ms": self.percentile(0.90),
+            "p99_ms": self.percentile(0.99),
+            "histogram": {
+                ("inf" if bound == float("inf") else f"le_{bound}ms"): count
+                for bound, count in zip(BUCKET_BOUNDS_MS, self.buckets)
+            },
+            "last": self.last,
+        }
+
+
+class ProbeRegistry:
+    """Start times and aggregated samples of every probe label."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._starts = {}  # label -> (start time, prompt id)
+        self._stats = {}
+
+    def _drop_stale(self, prompt_id):
+        # Starts left over by an earlier prompt (its sub-graph failed or was interrupted) never pair up
+        for label in [label for label, (_t, started_in) in self._starts.items() if started_in != prompt_id]:
+            del self._starts[label]
+
+    def start(self, label, prompt_id=None):
+        with self._lock:
+            self._drop_stale(prompt_id)
+            self._starts[label] = (time.perf_counter(), prompt_id)
+
+    def end(self, label, details, prompt_id=None):
+        """Record a sample for `label`; returns the elapsed ms, or None without a start in the same prompt."""
+        now = time.perf_counter()
+        with self._lock:
+            self._drop_stale(prompt_id)
+            started, _prompt_id = self._starts.pop(label, (None, None))
+            if started is None:
+                return None
+            elapsed_ms = (now - started) * 1000.0
+            self._stats.setdefault(label, ProbeStats()).add(elapsed_ms, details)
+        return elapsed_ms
+
+    def summary(self):
+        with self._lock:
+            return {label: stats.summary() for label, stats in self._stats.items()}
+
+    def reset(self):
+        with self._lock:
+            self._starts.clear()
+            self._stats.clear()
+
+    def to_csv(self):
+        """One row per label: summary columns followed by the histogram buckets."""
+        summary = self.summary()
+        bucket_names = [("inf" if bound == float("inf") else f"le_{bound}ms") for bound in BUCKET_BOUNDS_MS]
+        columns = ["label", "count", "mean_ms", "min_ms", "max_ms", "p50_ms", "p90_ms", "p99_ms"]
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(columns + bucket_names)
+        for label, stats in summary.items():
+            writer.writerow([label] + [stats[column] for column in columns[1:]] +
+                            [stats["histogram"][name] for name in bucket_names])
+        return output.getvalue()
+
+
+registry = ProbeRegistry()
+
+
+def current_prompt_id():
+    """Id of the prompt ComfyUI is executing, or None outside ComfyUI."""
+    return getattr(get_prompt_server(), "last_prompt_id", None)
+
+
+class ProbeStartNode:
+    """Marks the start of a timed sub-graph and passes its input through."""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "label": ("STRING", {"default": "stage"}),
+            },
+            "optional": {
+                "any_input": ("*",),
+                "always_run": (["disabled", "enabled"], {"default": "disabled"}),
+            }
+        }
+
+    RETURN_TYPES = ("*",)
+    FUNCTION = "start"
+    CATEGORY = "MisterMR/Utils"
+
+    @classmethod
+    def IS_CHANGED(cls, label, always_run="disabled", **kwargs):
+        if always_run == "enabled":
+            # Profiling sessions: re-run the probe, and so the sub-graph after it, on every queue
+            return float("nan")
+        return label
+
+    def start(self, label, any_input=None, always_run="disabled"):
+        registry.start(label, current_prompt_id())
+        return (any_input,)
+
+
+class ProbeEndNode:
+    """Records the wall time since the ProbeStart with the same label, plus value and memory stats."""
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "label": ("STRING", {"default": "stage"}),
+            },
+            "optional": {
+                "any_input": ("*",),
+                "csv_path": ("STRING", {"default": ""}),
+            }
+        }
+
+    RETURN_TYPES = ("*", "STRING")
+    RETURN_NAMES = ("any_output", "report")
+    FUNCTION = "end"
+    CATEGORY = "MisterMR/Utils"
+
+    def end(self, label, any_input=None, csv_path=""):
+        details = describe_value(any_input)
+        details.update(memory_snapshot())
+        elapsed_ms = registry.end(label, details, current_prompt_id())
+
+        if elapsed_ms is None:
+            report = f"{label}: no matching ProbeStart ran in this prompt (missing, or served from the cache)"
+            logger.warning("Probe %s ended without a matching start", label)
+        else:
+            report = f"{label}: {elapsed_ms:.2f} ms"
+            logger.info("Probe %s: %.2f ms %s", label, elapsed_ms, details)
+
+        if csv_path:
+            try:
+                with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+                    f.write(registry.to_csv())
+            except OSError as e:
+                logger.error("Could not write probe CSV %s: %s", csv_path, e)
+
+        return (any_input, report)
+
+
+def add_routes(routes, web):
+    @routes.get("/mrm/probes")
+    async def get_probe_stats(request):
+        return web.json_response(registry.summary())
+
+    @routes.get("/mrm/probes.csv")
+    async def get_probe_csv(request):
+        return web.Response(text=registry.to_csv(), content_type="text/csv")
+
+    @routes.post("/mrm/probes/reset")
+    async def reset_probe_stats(request):
+        registry.reset()
+        return web.json_response({"reset": True})
+
+
+# Outside a running ComfyUI server (scripts, benchmarks) the probes still record
+register_routes(add_routes)
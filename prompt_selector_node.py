@@ -1,23 +1,29 @@
-import sys
 import os
-import uuid
+import hashlib
+import itertools
+import math
 
-# Get the directory of the current script
-current_script_dir = os.path.dirname(os.path.abspath(__file__))
-# Navigate up two levels to get to the ComfyUI root directory
-comfyui_root_dir = os.path.abspath(os.path.join(current_script_dir, "..", ".."))
+from .logging_utils import get_logger
+from .prompt_templates import compile_template, parse_word_list, sample_combinations
+from .server_utils import CoalescingSender, register_routes
+from .state_store import LRUStateStore
 
-# Add the ComfyUI root directory to the Python path if it's not already there
-if comfyui_root_dir not in sys.path:
-    sys.path.insert(0, comfyui_root_dir)
+logger = get_logger("prompt_selector")
 
-from server import PromptServer
+# selected_index updates of every node go to the UI as one message per debounce window
+ui_updates = CoalescingSender(
+    "mrm.promptselector.batch_update",
+    delay=float(os.environ.get("MISTERMR_UI_UPDATE_DEBOUNCE_MS", "100")) / 1000.0,
+)
 
 class PromptSelectorNode:
     OUTPUT_NODE = True
     
-    # Class-level dictionary to persist state per node instance
-    node_states = {}
+    # Bounded class-level store to persist state per node instance
+    node_states = LRUStateStore(
+        max_entries=int(os.environ.get("MISTERMR_PROMPT_STATE_MAX", "256")),
+        ttl_seconds=float(os.environ.get("MISTERMR_PROMPT_STATE_TTL", str(24 * 3600)))
+    )
 
     def __init__(self):
         pass
@@ -32,6 +38,13 @@ class PromptSelectorNode:
                 "auto_increment": (["enabled", "disabled"], {"default": "enabled"}),
                 "selected_index": ("INT", {"default": 0, "min": 0, "max": 100, "step": 1, "control_after_generate": "increment"}),
             },
+            "optional": {
+                "expansion": (["disabled", "cartesian", "zip"], {"default": "disabled"}),
+                "extra_placeholders": ("STRING", {"default": "", "multiline": True}),
+                "chunk_size": ("INT", {"default": 0, "min": 0, "max": 100000}),
+                "selection": (["sequential", "weighted_random"], {"default": "sequential"}),
+                "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
+            },
             "hidden": {
                 "unique_id": ("UNIQUE_ID",)
             }
@@ -39,99 +52,226 @@ class PromptSelectorNode:
 
     RETURN_TYPES = ("STRING", "STRING")
     RETURN_NAMES = ("prompt", "selected_word")
+    # Outputs are lists so one execution can emit every expanded variant; ComfyUI maps downstream nodes over them
+    OUTPUT_IS_LIST = (True, True)
     FUNCTION = "replace_word"
     CATEGORY = "MisterMR/Text"
 
     @classmethod
     def IS_CHANGED(cls, prompt, word_to_replace, replacement_words, auto_increment, selected_index, **kwargs):
+        expansion = kwargs.get("expansion", "disabled")
+        # Seeded selection and full expansions don't depend on the index, so they can be cached
+        if kwargs.get("selection") == "weighted_random":
+            return (prompt, word_to_replace, replacement_words, expansion, kwargs.get("extra_placeholders", ""),
+                    kwargs.get("chunk_size", 0), kwargs.get("seed", 0))
+        if expansion != "disabled" and not kwargs.get("chunk_size"):
+            return (prompt, word_to_replace, replacement_words, expansion, kwargs.get("extra_placeholders", ""))
         # Always re-execute when auto_increment is enabled
         if auto_increment == "enabled":
             return float("nan")  # NaN is never equal to itself, forcing re-execution
         return (prompt, word_to_replace, replacement_words, auto_increment, selected_index)
 
-    def replace_word(self, prompt, word_to_replace, replacement_words, auto_increment, selected_index, **kwargs):
+    def parse_placeholders(self, extra_placeholders, weighted=False):
+        """Parse "PLACEHOLDER=word1|word2::weight|..." lines into (placeholder, words, weights) axes.
+
+        Weights are only parsed when `weighted` is set (weighted_random selection).
+        """
+        axes = []
+        for line in (extra_placeholders or "").split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            if '=' not in line:
+                logger.warning("Ignoring placeholder line without '=': %s", line)
+                continue
+            placeholder, entries = line.split('=', 1)
+            words, weights = parse_word_list(entries.split('|'), weighted)
+            if placeholder.strip() and words:
+                axes.append((placeholder.strip(), words, weights))
+        return axes
+
+    def count_combinations(self, axes, expansion):
+        """Number of variants the expansion produces."""
+        if expansion == "zip":
+            return min(len(axis[1]) for axis in axes)
+        return math.prod(len(axis[1]) for axis in axes)
+
+    def iter_combinations(self, axes, expansion):
+        """Lazily yield one tuple of words per variant."""
+        word_lists = [axis[1] for axis in axes]
+        if expansion == "zip":
+            return zip(*word_lists)
+        return itertools.product(*word_lists)
+
+    def select_index(self, selected_index, count, auto_increment):
+        """Clamp the widget index to `count` entries and work out the index to show next."""
+        # Clamp selected_index to valid range
+        use_index = min(selected_index, count - 1) if selected_index >= 0 else 0
+        
+        # Determine what to show in UI after execution
+        if auto_increment == "enabled":
+            # Auto-increment: show the next index in UI
+            next_index = (use_index + 1) % count
+        else:
+            # Manual mode: keep showing the same index
+            next_index = use_index
+        return use_index, next_index
+
+    def send_update(self, node_id, ui_index):
+        """Queue an update of the selected_index widget; only the latest index per node is sent."""
+        logger.debug("Queueing update: node=%s, index=%s", node_id, ui_index)
+        ui_updates.queue(node_id, {
+            "node": node_id,  # Use the same ID used for state
+            "selected_index": ui_index,
+        })
+
+    def render_prompts(self, prompt, axes, combinations):
+        """Render every combination through the compiled template of the prompt."""
+        template = compile_template(prompt, [axis[0] for axis in axes])
+        prompts = []
+        selected_words = []
+        for combination in combinations:
+            prompts.append(template.render(combination))
+            selected_words.append(", ".join(combination))
+        if not prompts:
+            return ([prompt], [""])
+        return (prompts, selected_words)
+
+    def expand_prompts(self, prompt, axes, expansion, chunk_size, selected_index, auto_increment, node_id):
+        """Substitute every combination of the placeholder words, optionally one chunk at a time."""
+        total = self.count_combinations(axes, expansion)
+        start, stop = 0, total
+        
+        if chunk_size > 0 and total > 0:
+            # selected_index walks over the chunks instead of the words
+            chunk_count = math.ceil(total / chunk_size)
+            use_index, next_index = self.select_index(selected_index, chunk_count, auto_increment)
+            start = use_index * chunk_size
+            stop = min(start + chunk_size, total)
+            logger.debug("Expanding chunk %d/%d", use_index + 1, chunk_count)
+            self.send_update(node_id, next_index)
+        
+        combinations = itertools.islice(self.iter_combinations(axes, expansion), start, stop)
+        logger.debug("Expanding %d of %d variants", stop - start, total)
+        return self.render_prompts(prompt, axes, combinations)
+
+    def sample_prompts(self, prompt, axes, expansion, chunk_size, seed):
+        """Seeded weighted random variants: one, or chunk_size (default: all combinations) when expanding."""
+        if any(not axis[1] for axis in axes):
+            return ([prompt], [""])
+        count = 1
+        if expansion != "disabled":
+            count = chunk_size or self.count_combinations(axes, expansion)
+        combinations = sample_combinations([axis[1] for axis in axes], [axis[2] for axis in axes], count, seed)
+        logger.debug("Sampled %d variants with seed %s", count, seed)
+        return self.render_prompts(prompt, axes, combinations)
+
+    def replace_word(self, prompt, word_to_replace, replacement_words, auto_increment, selected_index, expansion="disabled", extra_placeholders="", chunk_size=0, selection="sequential", seed=0, **kwargs):
         unique_id = kwargs.get('unique_id')
-        print(f"[PromptSelector] === EXECUTION START ===")
-        print(f"[PromptSelector] kwargs: {kwargs}")
-        print(f"[PromptSelector] unique_id received: {unique_id} (type: {type(unique_id) if unique_id else 'None'})")
-        print(f"[PromptSelector] auto_increment: {auto_increment}")
-        print(f"[PromptSelector] selected_index input: {selected_index}")
+        logger.debug("=== EXECUTION START ===")
+        logger.debug("kwargs: %r", kwargs)
+        logger.debug("unique_id received: %s (type: %s)", unique_id, type(unique_id).__name__)
+        logger.debug("auto_increment: %s", auto_increment)
+        logger.debug("selected_index input: %s", selected_index)
+        
+        # Hash of the word list, so the text itself doesn't have to be kept in the state;
+        # "::weight" suffixes are only parsed for weighted_random, so the mode is part of it
+        weighted = selection == "weighted_random"
+        words_hash = hashlib.sha1((("w:" if weighted else "") + replacement_words).encode('utf-8')).hexdigest()
         
         # Get or create state for this node instance
         node_id_for_state = unique_id
         if node_id_for_state is None:
             if hasattr(self, 'id') and self.id is not None:
                 node_id_for_state = str(self.id)
-                print(f"[PromptSelector] Using self.id as state key: {node_id_for_state}")
+                logger.debug("Using self.id as state key: %s", node_id_for_state)
             else:
-                # Generate a unique ID as last resort (shouldn't happen in normal operation)
-                node_id_for_state = f"node_{uuid.uuid4().hex[:8]}"
-                print(f"[PromptSelector] WARNING: Generated fallback ID: {node_id_for_state}")
+                # Stable fallback key (shouldn't happen in normal operation), so reruns reuse one entry
+                node_id_for_state = f"node_{words_hash[:8]}"
+                logger.warning("Generated fallback ID: %s", node_id_for_state)
         
         if node_id_for_state is None:
             raise ValueError("[PromptSelector] Cannot determine node identifier for state management")
         
-        print(f"[PromptSelector] node_id_for_state: {node_id_for_state}")
-        print(f"[PromptSelector] Current states: {list(PromptSelectorNode.node_states.keys())}")
+        logger.debug("node_id_for_state: %s", node_id_for_state)
+        logger.debug("Current states: %d", len(PromptSelectorNode.node_states))
         
         # Initialize state if it doesn't exist
-        if node_id_for_state not in PromptSelectorNode.node_states:
-            print(f"[PromptSelector] Creating new state for {node_id_for_state}")
-            PromptSelectorNode.node_states[node_id_for_state] = {
-                'words': [],
-                'last_words_text': None
-            }
-        
-        state = PromptSelectorNode.node_states[node_id_for_state]
-        print(f"[PromptSelector] State: words_count={len(state.get('words', []))}")
+        state = PromptSelectorNode.node_states.get_or_create(node_id_for_state, lambda: {
+            'words': (),
+            'weights': (),
+            'words_hash': None
+        })
+        logger.debug("State: words_count=%d", len(state.get('words', ())))
         
         # Parse replacement words from multiline text
-        if state['last_words_text'] != replacement_words:
-            state['words'] = [word.strip() for word in replacement_words.split('\n') if word.strip()]
-            state['last_words_text'] = replacement_words
-            print(f"[PromptSelector] Words updated: {len(state['words'])} words")
+        if state['words_hash'] != words_hash:
+            state['words'], state['weights'] = parse_word_list(replacement_words.split('\n'), weighted)
+            state['words_hash'] = words_hash
+            logger.debug("Words updated: %d words", len(state['words']))
+
+        axes = [(word_to_replace, state['words'], state['weights'])] + self.parse_placeholders(extra_placeholders, weighted)
+
+        if selection == "weighted_random":
+            result = self.sample_prompts(prompt, axes, expansion, chunk_size, seed)
+            logger.debug("=== EXECUTION END ===")
+            return result
+
+        if expansion != "disabled":
+            result = self.expand_prompts(prompt, axes, expansion, chunk_size, selected_index, auto_increment, node_id_for_state)
+            logger.debug("=== EXECUTION END ===")
+            return result
 
         if not state['words']:
-            return (prompt, "")
+            return ([prompt], [""])
 
-        # Clamp selected_index to valid range
-        clamped_selected_index = min(selected_index, len(state['words']) - 1) if selected_index >= 0 else 0
-        
         # Always use the selected_index from the widget - this is what the user sees
-        use_index = clamped_selected_index
-        print(f"[PromptSelector] Using index: {use_index}")
-        
-        # Determine what to show in UI after execution
-        if auto_increment == "enabled":
-            # Auto-increment: show the next index in UI
-            next_index = (use_index + 1) % len(state['words'])
-            print(f"[PromptSelector] Auto-increment enabled: next_index={next_index}")
-        else:
-            # Manual mode: keep showing the same index
-            next_index = use_index
-            print(f"[PromptSelector] Manual mode: keeping index={use_index}")
+        use_index, next_index = self.select_index(selected_index, len(state['words']), auto_increment)
+        logger.debug("Using index: %d, next index: %d", use_index, next_index)
 
-        # Get the replacement word
+        # Get the replacement word; extra placeholders follow the same index, wrapping around
         replacement_word = state['words'][use_index]
-        print(f"[PromptSelector] Using word: '{replacement_word}' at index {use_index}")
+        combination = (replacement_word,) + tuple(axis[1][use_index % len(axis[1])] for axis in axes[1:])
+        logger.debug("Using word: '%s' at index %d", replacement_word, use_index)
         
-        # Replace the word in the prompt
-        output_prompt = prompt.replace(word_to_replace, replacement_word)
+        # Replace the placeholders in the prompt
+        output_prompt = compile_template(prompt, [axis[0] for axis in axes]).render(combination)
         
-        # Send message to update the widget in the UI
-        ui_index = next_index
-        print(f"[PromptSelector] Sending update: node={node_id_for_state}, index={ui_index}")
-        try:
-            PromptServer.instance.send_sync(
-                "mrm.promptselector.update",
-                {
-                    "node": node_id_for_state,  # Use the same ID used for state
-                    "selected_index": ui_index,
-                }
-            )
-            print(f"[PromptSelector] Message sent successfully")
-        except Exception as e:
-            print(f"[PromptSelector] Error sending message: {e}")
-
-        print(f"[PromptSelector] === EXECUTION END ===")
-        return (output_prompt, replacement_word)
+        self.send_update(node_id_for_state, next_index)
+
+        logger.debug("=== EXECUTION END ===")
+        return ([output_prompt], [replacement_word])
+
+
+def describe_states():
+    """JSON-friendly summary of the PromptSelector state store."""
+    store = PromptSelectorNode.node_states
+    return {
+        "count": len(store),
+        "max_entries": store.max_entries,
+        "ttl_seconds": store.ttl_seconds,
+        "states": [
+            {
+                "node": key,
+                "idle_seconds": round(idle, 1),
+                "words_count": len(state.get('words', ())),
+                "words_hash": state.get('words_hash'),
+            }
+            for key, idle, state in store.snapshot()
+        ],
+    }
+
+
+def add_routes(routes, web):
+    @routes.get("/mrm/promptselector/state")
+    async def get_prompt_selector_state(request):
+        return web.json_response(describe_states())
+
+    @routes.post("/mrm/promptselector/state/clear")
+    async def clear_prompt_selector_state(request):
+        node = request.query.get("node")
+        removed = PromptSelectorNode.node_states.clear(node)
+        return web.json_response({"removed": removed})
+
+
+register_routes(add_routes)
@@ -0,0 +1,102 @@
+"""Compiled prompt templates with named placeholders.
+
+A template is scanned once for all of its placeholders and compiled into
+literal segments plus slot indices. Rendering a variant is a single join over
+those segments, with no string scanning, and substituted words are never
+searched again for other placeholders. Compiled templates are cached by a
+hash of the template text and placeholder names.
+
+Word lists accept an optional weight per entry, written "word::weight", for
+seeded weighted random selection.
+"""
+import hashlib
+import random
+import re
+
+from .lru_cache import LRUCache
+
+template_cache = LRUCache(128)
+
+
+class CompiledTemplate:
+    """A template split into literal segments around placeholder slots."""
+
+    def __init__(self, segments, slots):
+        self.segments = segments  # len(slots) + 1 literal strings
+        self.slots = slots        # placeholder index filling the gap after each segment
+
+    def render(self, values):
+        """Substitute `values` (one word per placeholder, in placeholder order)."""
+        parts = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            parts.append(values[slot])
+            parts.append(segment)
+        return "".join(parts)
+
+
+def _compile(template, placeholders):
+    names = [name for name in placeholders if name]
+    if not names:
+        return CompiledTemplate([template], [])
+
+    # Longest names first, so "COLOR_DARK" wins over "COLOR" at the same position
+    slot_of = {name: placeholders.index(name) for name in names}
+    pattern = re.compile("|".join(re.escape(name) for name in sorted(set(names), key=len, reverse=True)))
+
+    segments = []
+    slots = []
+    position = 0
+    for match in pattern.finditer(template):
+        segments.append(template[position:match.start()])
+        slots.append(slot_of[match.group(0)])
+        position = match.end()
+    segments.append(template[position:])
+    return CompiledTemplate(segments, slots)
+
+
+def compile_template(template, placeholders):
+    """Return the cached CompiledTemplate for `template` and the ordered placeholder names."""
+    placeholders = tuple(placeholders)
+    key = hashlib.sha1("\0".join((template,) + placeholders).encode('utf-8')).hexdigest()
+    return template_cache.get_or_create(key, lambda: _compile(template, placeholders))
+
+
+def parse_weighted_word(entry):
+    """Split "word::weight" into (word, weight); entries without a valid weight get 1.0."""
+    word, separator, weight = entry.rpartition("::")
+    if separator:
+        try:
+            return word.strip(), max(0.0, float(weight))
+        except ValueError:
+            pass
+    return entry.strip(), 1.0
+
+
+def parse_word_list(entries, weighted=False):
+    """Parse word entries into (words, weights) tuples, skipping blank ones.
+
+    "::weight" suffixes are only split off when `weighted` is set; otherwise
+    entries are kept verbatim (so "ratio 16::9" stays a word) with weight 1.0.
+    """
+    words = []
+    weights = []
+    for entry in entries:
+        if not entry.strip():
+            continue
+        word, weight = parse_weighted_word(entry) if weighted else (entry.strip(), 1.0)
+        if word:
+            words.append(word)
+            weights.append(weight)
+    return tuple(words), tuple(weights)
+
+
+def sample_combinations(word_lists, weight_lists, count, seed):
+    """Draw `count` weighted random combinations; the same seed always gives the same list."""
+    rng = random.Random(seed)
+    combinations = []
+    for _ in range(count):
+        combinations.append(tuple(
+            rng.choices(words, weights=weights if any(weights) else None)[0]
+            for words, weights in zip(word_lists, weight_lists)
+        ))
+    return combinations
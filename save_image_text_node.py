@@ -1,16 +1,37 @@
 import torch
 import numpy as np
 from PIL import Image
+import io
 import os
 import json
 from datetime import datetime
 
 import folder_paths
 
+from .image_convert import borrowed_pil_image
+from .image_writer import get_writer
+from .logging_utils import get_logger
+from . import shard_writer
+
+logger = get_logger("save_image_text")
+
 
 class SaveImageAndTextNode:
     """Node for saving an image and optionally a text file with the same filename prefix."""
     
+    # File extension and PIL format of every output format ("npy" is written with NumPy)
+    FORMATS = {
+        "png": (".png", "PNG"),
+        "png_fast": (".png", "PNG"),
+        "webp_lossless": (".webp", "WEBP"),
+        "webp": (".webp", "WEBP"),
+        "jpeg": (".jpg", "JPEG"),
+        "npy": (".npy", None),
+    }
+    
+    # Frames encoded before they are appended to a shard; bounds the encoded bytes held in memory
+    SHARD_CHUNK_FRAMES = 8
+    
     def __init__(self):
         self.output_dir = folder_paths.get_output_directory()
         self.type = "output"
@@ -26,6 +47,13 @@ class SaveImageAndTextNode:
             },
             "optional": {
                 "text": ("STRING", {"default": "", "multiline": True, "forceInput": True}),
+                "write_mode": (["sync", "background"], {"default": "sync"}),
+                "format": (list(cls.FORMATS.keys()), {"default": "png"}),
+                "compress_level": ("INT", {"default": 4, "min": 0, "max": 9}),
+                "quality": ("INT", {"default": 90, "min": 1, "max": 100}),
+                "metadata_mode": (["embed", "sidecar", "none"], {"default": "embed"}),
+                "output_mode": (["files", "tar_shards"], {"default": "files"}),
+                "shard_size": ("INT", {"default": 1000, "min": 1, "max": 1000000}),
             },
             "hidden": {
                 "prompt": "PROMPT",
@@ -38,8 +66,13 @@ class SaveImageAndTextNode:
     FUNCTION = "save_image_and_text"
     CATEGORY = "MisterMR/IO"
 
-    def save_image_and_text(self, image, filename_prefix="ComfyUI", text=None, prompt=None, extra_pnginfo=None):
-        """Save image as PNG and optionally save text file if text is provided."""
+    def save_image_and_text(self, image, filename_prefix="ComfyUI", text=None, write_mode="sync", format="png", compress_level=None, quality=90, metadata_mode="embed", output_mode="files", shard_size=1000, prompt=None, extra_pnginfo=None):
+        """Save image in the selected format and optionally save text file if text is provided."""
+        
+        # Surface failures of writes queued by earlier executions
+        errors = get_writer().pop_errors()
+        if errors:
+            raise RuntimeError("Background save failed for: " + "; ".join(errors))
         
         filename_prefix += self.prefix_append
         
@@ -48,51 +81,188 @@ class SaveImageAndTextNode:
             filename_prefix, self.output_dir, image.shape[2], image.shape[1]
         )
         
+        if output_mode == "tar_shards":
+            # Continue the shard manifest rather than the loose-file numbering
+            counter = shard_writer.reserve_counters(full_output_folder, filename, len(image), counter)
+        
+        if compress_level is None:
+            compress_level = self.compress_level
+        if format not in self.FORMATS:
+            format = "png"
+        extension, _pil_format = self.FORMATS[format]
+        
+        # Serialize the workflow once per execution and share it between every frame
+        metadata = None
+        if metadata_mode != "none" and format != "npy" and not (prompt is None and extra_pnginfo is None):
+            if metadata_mode == "sidecar":
+                # Write the workflow once next to the batch; each image only references it
+                sidecar_filename = f"{filename}_{counter:05d}_workflow.json"
+                sidecar_path = os.path.join(full_output_folder, sidecar_filename)
+                sidecar_text = self.serialize_workflow(prompt, extra_pnginfo)
+                if write_mode == "background":
+                    get_writer().submit(sidecar_path, self.write_text, sidecar_path, sidecar_text)
+                else:
+                    self.write_text(sidecar_path, sidecar_text)
+                metadata = {"workflow_ref": sidecar_filename}
+            else:
+                metadata = self.serialize_metadata(prompt, extra_pnginfo)
+        
+        # Encoder settings, including the embedded metadata where the format supports it
+        save_options = self.get_save_options(format, compress_level, quality, metadata)
+        
+        if output_mode == "tar_shards":
+            # Frames are views of the batch; each is converted and encoded only when its chunk is written
+            caption = text if text is not None and text.strip() else None
+            shard_args = (full_output_folder, filename, shard_size, counter, image, format, save_options, caption)
+            if write_mode == "background":
+                get_writer().submit(shard_writer.manifest_path(full_output_folder, filename), self.write_shard_samples, *shard_args)
+            else:
+                self.write_shard_samples(*shard_args)
+            # Samples live inside the shards, there are no loose files to preview
+            return {"ui": {"images": []}}
+        
         results = []
         
+        # One frame at a time: conversion goes through a reused uint8 buffer, frames stay on their device
         for batch_index, img_tensor in enumerate(image):
-            # Convert tensor to PIL Image
-            img_array = img_tensor.cpu().numpy()
-            img_array = (img_array * 255).astype(np.uint8)
-            pil_image = Image.fromarray(img_array)
-            
-            # Prepare metadata for PNG
-            metadata = None
-            if not (prompt is None and extra_pnginfo is None):
-                from PIL.PngImagePlugin import PngInfo
-                metadata = PngInfo()
-                if prompt is not None:
-                    metadata.add_text("prompt", json.dumps(prompt))
-                if extra_pnginfo is not None:
-                    for key in extra_pnginfo:
-                        metadata.add_text(key, json.dumps(extra_pnginfo[key]))
-            
             # Generate filename with counter
             if batch_index == 0:
                 file_base = f"{filename}_{counter:05d}_"
             else:
                 file_base = f"{filename}_{counter:05d}_{batch_index:02d}_"
             
-            # Save image as PNG
-            image_filename = f"{file_base}.png"
+            image_filename = f"{file_base}{extension}"
             image_path = os.path.join(full_output_folder, image_filename)
             
-            pil_image.save(image_path, pnginfo=metadata, compress_level=self.compress_level)
-            
             # Save text file only if text is provided and not empty
+            text_path = None
             if text is not None and text.strip():
                 text_filename = f"{file_base}.txt"
                 text_path = os.path.join(full_output_folder, text_filename)
-                
-                with open(text_path, 'w', encoding='utf-8') as f:
-                    f.write(text)
             
-            results.append({
-                "filename": image_filename,
-                "subfolder": subfolder,
-                "type": self.type
-            })
+            if write_mode == "background":
+                # Encoding happens on the writer pool; the node returns right away
+                get_writer().submit(image_path, self.write_files, img_tensor, image_path, format, save_options, text_path, text)
+            else:
+                self.write_files(img_tensor, image_path, format, save_options, text_path, text)
+            
+            # Raw arrays can't be previewed in the UI, and background files may not exist yet when it asks for them
+            if format != "npy" and write_mode != "background":
+                results.append({
+                    "filename": image_filename,
+                    "subfolder": subfolder,
+                    "type": self.type
+                })
             
             counter += 1
         
         return {"ui": {"images": results}}
+
+    def serialize_metadata(self, prompt=None, extra_pnginfo=None):
+        """JSON-encode the prompt and every extra_pnginfo entry, keyed like the PNG text chunks."""
+        metadata = {}
+        if prompt is not None:
+            metadata["prompt"] = json.dumps(prompt)
+        if extra_pnginfo is not None:
+            for key in extra_pnginfo:
+                metadata[key] = json.dumps(extra_pnginfo[key])
+        return metadata
+
+    def serialize_workflow(self, prompt=None, extra_pnginfo=None):
+        """Whole workflow payload for the sidecar file."""
+        workflow = {}
+        if prompt is not None:
+            workflow["prompt"] = prompt
+        if extra_pnginfo is not None:
+            workflow.update(extra_pnginfo)
+        return json.dumps(workflow)
+
+    def get_save_options(self, image_format, compress_level, quality, metadata=None):
+        """PIL save() arguments for the format, with pre-serialized metadata embedded where supported."""
+        if image_format == "png_fast":
+            # Scratch outputs: barely compressed, several times faster to encode
+            options = {"compress_level": 1}
+        elif image_format == "webp_lossless":
+            options = {"lossless": True, "quality": quality}
+        elif image_format in ("webp", "jpeg"):
+            options = {"quality": quality}
+        elif image_format == "npy":
+            return {}
+        else:
+            options = {"compress_level": compress_level}
+        
+        if not metadata:
+            return options
+        
+        if image_format in ("png", "png_fast"):
+            from PIL.PngImagePlugin import PngInfo
+            png_info = PngInfo()
+            for key, value in metadata.items():
+                png_info.add_text(key, value)
+            options["pnginfo"] = png_info
+        else:
+            # Same EXIF layout as ComfyUI's WebP saver: prompt in Model, extra info from Make downwards
+            exif = Image.Exif()
+            tag = 0x010f
+            for key, value in metadata.items():
+                if key == "prompt":
+                    exif[0x0110] = "prompt:{}".format(value)
+                else:
+                    exif[tag] = "{}:{}".format(key, value)
+                    tag -= 1
+            exif_bytes = exif.tobytes()
+            # JPEG stores EXIF in a single 64KB segment
+            if image_format == "jpeg" and len(exif_bytes) > 65533:
+                logger.warning("Workflow metadata is too large for JPEG EXIF and was not embedded")
+            else:
+                options["exif"] = exif_bytes
+        
+        return options
+
+    def encode_image(self, img_tensor, image_format, save_options):
+        """Encode one image in the selected format and return the file bytes."""
+        buffer = io.BytesIO()
+        if image_format == "npy":
+            np.save(buffer, img_tensor.detach().cpu().numpy().astype(np.float32, copy=False))
+        else:
+            self.save_pil(img_tensor, buffer, image_format, save_options)
+        return buffer.getvalue()
+
+    def save_pil(self, img_tensor, fp, image_format, save_options):
+        """Encode one frame with PIL through a pooled uint8 buffer."""
+        _extension, pil_format = self.FORMATS[image_format]
+        with borrowed_pil_image(img_tensor) as pil_image:
+            if pil_format == "JPEG" and pil_image.mode != "RGB":
+                pil_image = pil_image.convert("RGB")
+            pil_image.save(fp, format=pil_format, **save_options)
+
+    def write_shard_samples(self, folder, filename, shard_size, counter, frames, image_format, save_options, caption=None):
+        """Encode a batch and append it, with its captions, to the tar shards and manifest.
+
+        Frames are encoded and written in chunks of SHARD_CHUNK_FRAMES, so only one
+        chunk of encoded bytes is held in memory however large the batch is.
+        """
+        extension = self.FORMATS[image_format][0]
+        for start in range(0, len(frames), self.SHARD_CHUNK_FRAMES):
+            samples = [
+                (counter + batch_index, extension, self.encode_image(frames[batch_index], image_format, save_options), caption)
+                for batch_index in range(start, min(len(frames), start + self.SHARD_CHUNK_FRAMES))
+            ]
+            shard_writer.write_samples(folder, filename, shard_size, samples)
+            del samples
+
+    def write_files(self, img_tensor, image_path, image_format, save_options, text_path=None, text=None):
+        """Encode one image in the selected format and write its optional text file."""
+        if image_format == "npy":
+            # Raw float array for intermediate stages, no quantization
+            np.save(image_path, img_tensor.detach().cpu().numpy().astype(np.float32, copy=False))
+        else:
+            self.save_pil(img_tensor, image_path, image_format, save_options)
+        
+        if text_path is not None:
+            self.write_text(text_path, text)
+
+    def write_text(self, text_path, text):
+        """Write a UTF-8 text file."""
+        with open(text_path, 'w', encoding='utf-8') as f:
+            f.write(text)
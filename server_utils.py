@@ -0,0 +1,88 @@
+"""Access to the ComfyUI server without importing it.
+
+ComfyUI has already imported its `server` module by the time custom nodes
+load, so the running PromptServer is taken from sys.modules instead of
+importing `server` (and manipulating sys.path to find it). Outside ComfyUI
+(scripts, benchmarks) there is no server: routes are not registered and UI
+messages are dropped. CoalescingSender batches frequent UI updates into one
+message per debounce window.
+"""
+import sys
+import threading
+
+from .logging_utils import get_logger
+
+logger = get_logger("server")
+
+
+def get_prompt_server():
+    """The running PromptServer instance, or None outside ComfyUI."""
+    server = sys.modules.get("server")
+    prompt_server = getattr(server, "PromptServer", None)
+    return getattr(prompt_server, "instance", None)
+
+
+def send_message(event, data):
+    """send_sync a UI message; returns False when there is no server to send it to."""
+    prompt_server = get_prompt_server()
+    if prompt_server is None:
+        return False
+    prompt_server.send_sync(event, data)
+    return True
+
+
+def register_routes(register):
+    """Call register(routes, web) with the server's route table and aiohttp.web, if a server is running."""
+    prompt_server = get_prompt_server()
+    if prompt_server is None:
+        logger.debug("PromptServer not available, %s routes not registered", register.__module__)
+        return False
+    try:
+        from aiohttp import web  # Already loaded by a real server
+    except ImportError:
+        # A stand-in PromptServer (benchmarks, scripts) without aiohttp behind it
+        logger.debug("aiohttp not available, %s routes not registered", register.__module__)
+        return False
+    register(prompt_server.routes, web)
+    return True
+
+
+class CoalescingSender:
+    """Debounced UI messages: updates queued within `delay` seconds go out as one message.
+
+    Updates are keyed (e.g. by node id) and only the latest value per key is
+    kept, so a fast queue sends one message per window however many times the
+    nodes ran, carrying `{"updates": [value, ...]}`.
+    """
+
+    def __init__(self, event, delay):
+        self.event = event
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def queue(self, key, value):
+        with self._lock:
+            self._pending[key] = value
+            if self.delay > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(self.delay, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        # No debouncing: send right away
+        self.flush()
+
+    def flush(self):
+        """Send everything queued so far as a single message."""
+        with self._lock:
+            updates = list(self._pending.values())
+            self._pending.clear()
+            self._timer = None
+        if not updates:
+            return
+        try:
+            send_message(self.event, {"updates": updates})
+        except Exception as e:
+            logger.warning("Error sending %s: %s", self.event, e)
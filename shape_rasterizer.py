@@ -0,0 +1,116 @@
+"""Antialiased shape rasterizer working directly on float image tensors.
+
+Shapes follow the PIL ImageDraw conventions used by AddSingleObjectNode: the
+bounding box [x, y, x + width, y + height] is inclusive, the border grows
+inward from the outline and the fill covers the whole shape underneath it.
+
+Tolerance against the PIL path: rectangles and all shape interiors match
+within 1/255 per channel (PIL quantizes to uint8, this path stays in float).
+Pixels on the antialiased edge of circles and rounded corners can differ by up
+to their fractional coverage, since PIL draws those edges aliased.
+
+Rectangles are built from per-axis edge ramps and never cached. Circle and
+rounded-rectangle masks need a full distance field and are kept in an LRU
+cache bounded by bytes (MISTERMR_SHAPE_CACHE_MB, default 64).
+"""
+import os
+
+import torch
+
+from .compositing import blend_coverage
+from .lru_cache import LRUCache
+
+
+def _masks_bytes(masks):
+    return sum(mask.numel() * mask.element_size() for mask in masks if mask is not None)
+
+
+coverage_cache = LRUCache(int(os.environ.get("MISTERMR_SHAPE_CACHE_MB", "64")) * 2 ** 20, weigh=_masks_bytes)
+
+
+def round_rect_radius(width, height):
+    """Corner radius used for round_rect shapes (same rule as the PIL path)."""
+    return min(20, min(width, height) // 4)
+
+
+def _signed_distance(object_type, width, height, radius):
+    """Signed distance (negative inside) from every pixel center to the shape outline."""
+    # PIL boxes are inclusive, so the shape spans width + 1 by height + 1 pixels
+    box_width = width + 1
+    box_height = height + 1
+    half_x = box_width / 2.0
+    half_y = box_height / 2.0
+
+    px = (torch.arange(box_width, dtype=torch.float32) + 0.5 - half_x).unsqueeze(0)
+    py = (torch.arange(box_height, dtype=torch.float32) + 0.5 - half_y).unsqueeze(1)
+
+    if object_type == "circle":
+        # Ellipse distance approximation: k0 * (k0 - 1) / k1
+        k0 = torch.sqrt((px / half_x) ** 2 + (py / half_y) ** 2)
+        k1 = torch.sqrt((px / half_x ** 2) ** 2 + (py / half_y ** 2) ** 2).clamp_min(1e-6)
+        return k0 * (k0 - 1.0) / k1
+
+    if object_type != "round_rect":
+        radius = 0
+    radius = min(radius, half_x, half_y)
+    qx = px.abs() - half_x + radius
+    qy = py.abs() - half_y + radius
+    outside = torch.sqrt(qx.clamp_min(0) ** 2 + qy.clamp_min(0) ** 2)
+    inside = torch.maximum(qx, qy).clamp_max(0)
+    return outside + inside - radius
+
+
+def _rect_coverage(width, height, border_size):
+    """Rectangle masks from per-axis edge ramps, without a 2-D distance field.
+
+    Inside an axis-aligned box the signed distance is max(qx, qy), so the inner
+    edge of the border is the minimum of the two 1-D ramps and the fill is solid.
+    """
+    # PIL boxes are inclusive, so the shape spans width + 1 by height + 1 pixels
+    fill_coverage = torch.ones(1, 1).expand(height + 1, width + 1)
+    if border_size <= 0:
+        return fill_coverage, None
+
+    def inner_ramp(size):
+        half = size / 2.0
+        q = (torch.arange(size, dtype=torch.float32) + 0.5 - half).abs() - half
+        return (0.5 - (q + border_size)).clamp(0.0, 1.0)
+
+    inner_coverage = torch.minimum(inner_ramp(height + 1).unsqueeze(1), inner_ramp(width + 1).unsqueeze(0))
+    return fill_coverage, 1.0 - inner_coverage
+
+
+def shape_coverage(object_type, width, height, border_size):
+    """Return (fill_coverage, border_coverage) masks shaped [height + 1, width + 1].
+
+    Masks may be cached or expanded views shared between calls, so callers must
+    not modify them.
+    """
+    if object_type not in ("circle", "round_rect"):
+        return _rect_coverage(width, height, border_size)
+    key = (object_type, width, height, border_size)
+    return coverage_cache.get_or_create(key, lambda: _distance_coverage(object_type, width, height, border_size))
+
+
+def _distance_coverage(object_type, width, height, border_size):
+    distance = _signed_distance(object_type, width, height, round_rect_radius(width, height))
+
+    # One pixel wide antialiasing ramp centered on the outline
+    fill_coverage = (0.5 - distance).clamp(0.0, 1.0)
+    border_coverage = None
+    if border_size > 0:
+        inner_coverage = (0.5 - (distance + border_size)).clamp(0.0, 1.0)
+        border_coverage = (fill_coverage - inner_coverage).clamp_min(0.0)
+    return fill_coverage, border_coverage
+
+
+def draw_shape(frames, x, y, width, height, object_type, border_size, border_rgba, fill_rgba=None):
+    """Rasterize a shape and alpha-blend it in place onto `frames` ([H,W,C] or [B,H,W,C])."""
+    fill_coverage, border_coverage = shape_coverage(object_type, width, height, border_size)
+
+    # Same drawing order as PIL: fill first, then the outline on top of it
+    if fill_rgba is not None:
+        blend_coverage(frames, x, y, fill_coverage, fill_rgba)
+    if border_coverage is not None and border_rgba is not None and border_rgba != fill_rgba:
+        blend_coverage(frames, x, y, border_coverage, border_rgba)
+    return frames
@@ -0,0 +1,129 @@
+"""Tar shard output for SaveImageAndTextNode.
+
+Instead of one image file plus one text file per sample, samples are appended
+to WebDataset-style tar shards: every sample is stored as "<key><ext>" plus an
+optional "<key>.txt" caption, with key = "<filename>_<counter>". Shards hold
+`shard_size` consecutive counters and are named "<filename>_shard_<index>.tar".
+
+Every sample also gets one line in "<filename>_manifest.jsonl" with the shard,
+member names, data offsets and sizes, caption and counter, so any sample can
+be read back with a single seek (see read_sample()). Neither name parses as a
+counter in folder_paths.get_save_image_path, so the two output modes can share
+a folder.
+"""
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+
+_lock = threading.Lock()
+# Next counter per (folder, filename), so queued batches never reuse a counter
+_next_counters = {}
+
+
+def manifest_path(folder, filename):
+    return os.path.join(folder, f"{filename}_manifest.jsonl")
+
+
+def shard_name(filename, shard_index):
+    return f"{filename}_shard_{shard_index:05d}.tar"
+
+
+def _read_last_counter(path):
+    """Highest counter among the last manifest entries, reading only the tail of the file."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 65536))
+        lines = f.read().splitlines()
+    # Batches written by the background pool may land slightly out of order
+    last_counter = None
+    for line in lines:
+        try:
+            counter = json.loads(line)["counter"]
+        except (ValueError, KeyError):
+            continue  # The first line of the tail may be cut in half
+        if last_counter is None or counter > last_counter:
+            last_counter = counter
+    return last_counter
+
+
+def reserve_counters(folder, filename, count, start_counter):
+    """Reserve `count` consecutive counters, continuing the manifest when it already exists.
+
+    `start_counter` is the counter folder_paths.get_save_image_path computed for
+    the folder; the larger of the two wins.
+    """
+    key = (folder, filename)
+    with _lock:
+        next_counter = _next_counters.get(key)
+        if next_counter is None:
+            last_counter = _read_last_counter(manifest_path(folder, filename))
+            next_counter = start_counter if last_counter is None else max(start_counter, last_counter + 1)
+        _next_counters[key] = next_counter + count
+    return next_counter
+
+
+def _add_member(tar, name, data, mtime):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = mtime
+    # addfile stores a copy of info, so the data offset is worked out here:
+    # the header (plus any long-name headers) is written at the current offset
+    offset_data = tar.offset + len(info.tobuf(tar.format, tar.encoding, tar.errors))
+    tar.addfile(info, io.BytesIO(data))
+    return offset_data
+
+
+def write_samples(folder, filename, shard_size, samples):
+    """Append samples to their shards and record them in the manifest.
+
+    `samples` is a list of (counter, extension, image_bytes, caption) tuples in
+    counter order; caption may be None.
+    """
+    entries = []
+    mtime = int(time.time())
+
+    with _lock:
+        # Group consecutive samples by shard so every shard is opened once per batch
+        index = 0
+        while index < len(samples):
+            shard_index = samples[index][0] // shard_size
+            shard = shard_name(filename, shard_index)
+            with tarfile.open(os.path.join(folder, shard), "a") as tar:
+                while index < len(samples) and samples[index][0] // shard_size == shard_index:
+                    counter, extension, image_bytes, caption = samples[index]
+                    key = f"{filename}_{counter:05d}"
+                    entry = {
+                        "key": key,
+                        "counter": counter,
+                        "shard": shard,
+                        "filename": f"{key}{extension}",
+                        "offset": _add_member(tar, f"{key}{extension}", image_bytes, mtime),
+                        "size": len(image_bytes),
+                        "caption": caption,
+                    }
+                    if caption is not None:
+                        caption_bytes = caption.encode('utf-8')
+                        entry["caption_filename"] = f"{key}.txt"
+                        entry["caption_offset"] = _add_member(tar, f"{key}.txt", caption_bytes, mtime)
+                        entry["caption_size"] = len(caption_bytes)
+                    entries.append(entry)
+                    index += 1
+
+        with open(manifest_path(folder, filename), 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+    return entries
+
+
+def read_sample(folder, entry):
+    """Read the image bytes of a manifest entry straight from its shard."""
+    with open(os.path.join(folder, entry["shard"]), 'rb') as f:
+        f.seek(entry["offset"])
+        return f.read(entry["size"])
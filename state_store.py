@@ -0,0 +1,72 @@
+"""Bounded per-node state store with LRU and TTL eviction.
+
+Used by PromptSelectorNode instead of an ever-growing class-level dict. At
+most `max_entries` node states are kept (least recently used are evicted
+first) and states untouched for `ttl_seconds` are dropped on the next access.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUStateStore:
+    """Thread-safe mapping of node id -> state dict, bounded by size and age."""
+
+    def __init__(self, max_entries=256, ttl_seconds=24 * 3600):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._states = OrderedDict()  # key -> (last_access, state)
+
+    def _expire(self, now):
+        if not self.ttl_seconds:
+            return
+        # Oldest entries sit at the front, so stop at the first fresh one
+        while self._states:
+            key, (last_access, _state) = next(iter(self._states.items()))
+            if now - last_access <= self.ttl_seconds:
+                break
+            del self._states[key]
+
+    def get_or_create(self, key, factory):
+        """Return the state for `key`, creating it with factory() if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._states.get(key)
+            state = entry[1] if entry is not None else factory()
+            self._states[key] = (now, state)
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_entries:
+                self._states.popitem(last=False)
+            return state
+
+    def get(self, key):
+        """Return the state for `key` without creating it, or None."""
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._states.get(key)
+            return entry[1] if entry is not None else None
+
+    def clear(self, key=None):
+        """Drop one state, or every state when `key` is None. Returns the number removed."""
+        with self._lock:
+            if key is None:
+                removed = len(self._states)
+                self._states.clear()
+                return removed
+            return 1 if self._states.pop(key, None) is not None else 0
+
+    def snapshot(self):
+        """List of (key, seconds since last access, state) tuples, most recent last."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            return [(key, now - last_access, state) for key, (last_access, state) in self._states.items()]
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._states)
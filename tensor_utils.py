@@ -0,0 +1,17 @@
+import hashlib
+
+import torch
+
+
+def tensor_fingerprint(tensor):
+    """Content hash of a tensor: shape, dtype and every value.
+
+    Used as a key for cached content (a wrong hit would mean wrong pixels), so
+    nothing is sampled; hashing a logo is cheap next to resizing it.
+    """
+    data = tensor.detach().to(device="cpu").contiguous()
+
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{tuple(tensor.shape)}|{tensor.dtype}".encode())
+    digest.update(data.reshape(-1).view(torch.uint8).numpy())
+    return digest.hexdigest()
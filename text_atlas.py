@@ -0,0 +1,89 @@
+"""Cached text masks for captions that repeat over many frames.
+
+A (text, font) layout is rasterized once with PIL into an antialiased
+coverage mask and kept in an LRU cache (256 masks, MISTERMR_TEXT_CACHE_SIZE).
+Every later frame only pays for a vectorized tensor blend of that mask; the
+text color is applied at blend time, so the same mask is reused for every
+color.
+"""
+import math
+
+import numpy as np
+import torch
+from PIL import Image, ImageDraw
+
+from .compositing import blend_coverage
+from .font_cache import font_cache_key, font_lock
+from .lru_cache import LRUCache
+
+mask_cache = LRUCache(256, "MISTERMR_TEXT_CACHE_SIZE")
+
+# Scratch surface used only for text measurement
+_measure_draw = ImageDraw.Draw(Image.new('L', (1, 1)))
+
+
+class TextMask:
+    """Rasterized text coverage plus the layout box it was measured with."""
+
+    def __init__(self, coverage, bbox):
+        self.coverage = coverage  # [h, w] float32 tensor in [0, 1], or None for empty text
+        self.bbox = bbox          # Integer textbbox((0, 0)) of the text: (left, top, right, bottom)
+
+    @property
+    def text_width(self):
+        return self.bbox[2] - self.bbox[0]
+
+    @property
+    def text_height(self):
+        return self.bbox[3] - self.bbox[1]
+
+
+def _rasterize(text, font, align):
+    with font_lock:
+        # ImageDraw measurement goes through the font object, which isn't thread-safe
+        bbox = _measure_draw.textbbox((0, 0), text, font=font, align=align)
+    # Centered/right-aligned multi-line text has fractional bounds; cover them in whole pixels
+    bbox = (math.floor(bbox[0]), math.floor(bbox[1]), math.ceil(bbox[2]), math.ceil(bbox[3]))
+    width = bbox[2] - bbox[0]
+    height = bbox[3] - bbox[1]
+    if width <= 0 or height <= 0:
+        return TextMask(None, bbox)
+
+    mask = Image.new('L', (width, height), 0)
+    with font_lock:
+        ImageDraw.Draw(mask).text((-bbox[0], -bbox[1]), text, fill=255, font=font, align=align)
+    coverage = torch.from_numpy(np.asarray(mask, dtype=np.float32) / 255.0)
+    return TextMask(coverage, bbox)
+
+
+def get_text_mask(text, font, align="left"):
+    """Return the cached TextMask for `text` rendered with `font`, rasterizing it on first use.
+
+    `align` positions the lines of multi-line text relative to each other.
+    """
+    key = (text, font_cache_key(font), align)
+    return mask_cache.get_or_create(key, lambda: _rasterize(text, font, align))
+
+
+def text_mask_origin(text_mask, x, y, width, height, justification):
+    """Top-left corner of the mask when its text is laid out in the box like the PIL path does."""
+    # Calculate position based on justification
+    if justification == "center":
+        text_x = x + (width - text_mask.text_width) // 2
+    elif justification == "right":
+        text_x = x + width - text_mask.text_width
+    else:  # left
+        text_x = x
+    text_y = y + (height - text_mask.text_height) // 2
+
+    # The mask starts at the bbox origin, not at the text anchor
+    return text_x + text_mask.bbox[0], text_y + text_mask.bbox[1]
+
+
+def draw_text_mask(frames, text, font, x, y, width, height, justification, rgba, align="left"):
+    """Lay out `text` in the box like the PIL path does and blend it in place onto `frames`."""
+    text_mask = get_text_mask(text, font, align)
+    mask_x, mask_y = text_mask_origin(text_mask, x, y, width, height, justification)
+    blend_coverage(frames, mask_x, mask_y, text_mask.coverage, rgba)
+    return frames
+
@@ -0,0 +1,155 @@
+"""Word wrapping and auto-fit of text inside a box, with memoized measurement.
+
+Widths of words, spaces and single characters are measured once per font
+(FreeType advance via font.getlength) and kept in an LRU cache, so wrapping a
+caption at a new width or trying another font size mostly adds up cached
+numbers. Auto-fit binary-searches the largest font size whose wrapped text
+fits the box; finished layouts are cached too, so a batch that repeats
+captions lays each one out once.
+"""
+from .font_cache import font_cache_key, font_lock
+from .lru_cache import LRUCache
+
+LAYOUT_MODES = ["single_line", "wrap", "fit"]
+
+# Pixels between lines, same as PIL's multiline_text default
+LINE_SPACING = 4
+MIN_FIT_SIZE = 8
+
+width_cache = LRUCache(65536, "MISTERMR_TEXT_MEASURE_CACHE_SIZE")
+layout_cache = LRUCache(1024, "MISTERMR_TEXT_LAYOUT_CACHE_SIZE")
+
+
+def _measure(font, text):
+    with font_lock:
+        return font.getlength(text)
+
+
+def text_width(font, text):
+    """Advance width of `text` in `font`, memoized per (font, text)."""
+    return width_cache.get_or_create((font_cache_key(font), text), lambda: _measure(font, text))
+
+
+def line_metrics(font):
+    """(line_advance, line_height) used to stack wrapped lines, like PIL's multiline_text."""
+    return width_cache.get_or_create((font_cache_key(font), "\0metrics"), lambda: _measure_lines(font))
+
+
+def _measure_lines(font):
+    with font_lock:
+        # PIL advances multi-line text by the bottom of "A" plus the spacing
+        advance = font.getbbox("A")[3] + LINE_SPACING
+        height = font.getbbox("Ag")[3]
+    return advance, height
+
+
+def _break_word(font, word, max_width):
+    """Split a word wider than max_width into pieces that fit, character by character."""
+    pieces = []
+    current = ""
+    current_width = 0.0
+    for char in word:
+        char_width = text_width(font, char)
+        if current and current_width + char_width > max_width:
+            pieces.append(current)
+            current, current_width = "", 0.0
+        current += char
+        current_width += char_width
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def wrap_text(text, font, max_width):
+    """Greedy word wrap of every paragraph of `text` to max_width; returns the list of lines."""
+    space_width = text_width(font, " ")
+    lines = []
+    for paragraph in text.split("\n"):
+        words = paragraph.split()
+        if not words:
+            lines.append("")
+            continue
+        current = ""
+        current_width = 0.0
+        for word in words:
+            word_width = text_width(font, word)
+            if word_width > max_width:
+                # Too long for any line on its own
+                pieces = _break_word(font, word, max_width)
+                if current:
+                    lines.append(current)
+                lines.extend(pieces[:-1])
+                current = pieces[-1]
+                current_width = text_width(font, current)
+                continue
+            if current and current_width + space_width + word_width > max_width:
+                lines.append(current)
+                current, current_width = word, word_width
+            elif current:
+                current += " " + word
+                current_width += space_width + word_width
+            else:
+                current, current_width = word, word_width
+        lines.append(current)
+    return lines
+
+
+def block_size(lines, font):
+    """(width, height) of wrapped lines drawn as one multi-line block."""
+    advance, height = line_metrics(font)
+    width = max((text_width(font, line) for line in lines), default=0)
+    return width, advance * (len(lines) - 1) + height
+
+
+def _fits(lines, font, width, height):
+    block_width, block_height = block_size(lines, font)
+    return block_width <= width and block_height <= height
+
+
+def layout_text(text, width, height, font_size, mode, load_font):
+    """Lay out `text` for a width x height box.
+
+    `load_font(size)` returns the font at a size. Returns (text, font): the text
+    with line breaks inserted and the font to draw it with. "single_line" leaves
+    the text alone, "wrap" wraps it at `font_size`, and "fit" wraps it at the
+    largest size up to `font_size` (and no smaller than MIN_FIT_SIZE) whose
+    block fits the box.
+    """
+    if mode not in ("wrap", "fit"):
+        return text, load_font(font_size)
+
+    key = (text, width, height, font_size, mode, font_cache_key(load_font(font_size)))
+    layout = layout_cache.get(key)
+    if layout is not None:
+        return layout
+
+    if mode == "wrap":
+        font = load_font(font_size)
+        layout = ("\n".join(wrap_text(text, font, width)), font)
+    else:
+        low = min(MIN_FIT_SIZE, font_size)
+        high = font_size
+        best = None
+        # Largest size that fits; every probe is a wrap over cached widths
+        while low <= high:
+            size = (low + high) // 2
+            font = load_font(size)
+            lines = wrap_text(text, font, width)
+            if _fits(lines, font, width, height):
+                best = (lines, font)
+                low = size + 1
+            else:
+                high = size - 1
+        if best is None:
+            font = load_font(min(MIN_FIT_SIZE, font_size))
+            best = (wrap_text(text, font, width), font)
+        layout = ("\n".join(best[0]), best[1])
+
+    layout_cache.put(key, layout)
+    return layout
+
+
+def clear_layout_cache():
+    """Drop every memoized width and layout."""
+    width_cache.clear()
+    layout_cache.clear()
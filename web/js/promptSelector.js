@@ -3,14 +3,69 @@ import { api } from "../../scripts/api.js";
 
 console.log("[PromptSelector] Extension file loaded!");
 
+// Delay before recounting lines after an edit of replacement_words
+const LINE_COUNT_DEBOUNCE_MS = 150;
+
+// Count non-blank lines in text[start:] without splitting it into an array
+function countNonBlankLines(text, start = 0) {
+  let count = 0;
+  let lineStart = start;
+  while (lineStart <= text.length) {
+    let lineEnd = text.indexOf('\n', lineStart);
+    if (lineEnd === -1) lineEnd = text.length;
+    for (let i = lineStart; i < lineEnd; i++) {
+      const c = text.charCodeAt(i);
+      // Anything but space, tab, CR and the other whitespace trim() removes
+      if (c > 32 && c !== 160 && c !== 0xfeff) {
+        count++;
+        break;
+      }
+    }
+    lineStart = lineEnd + 1;
+  }
+  return count;
+}
+
+// Start of the last line of text
+function lastLineStart(text) {
+  return text.lastIndexOf('\n') + 1;
+}
+
 app.registerExtension({
   name: "PromptSelectorUI",
 
   // Function to count words in replacement_words text
   countWords(text) {
     if (!text) return 0;
-    const lines = text.split('\n').filter(line => line.trim().length > 0);
-    return lines.length;
+    return countNonBlankLines(text);
+  },
+
+  // Line count of a node's replacement_words, cached per node and updated incrementally.
+  // When the new text only appends to the previous one (typing or pasting at the end),
+  // only the last previous line and the appended part are scanned.
+  getLineCount(node, text) {
+    text = text || "";
+    const cache = node._mrmLineCount;
+    if (cache && cache.text === text) return cache.count;
+
+    let count;
+    if (cache && text.length > cache.text.length && text.startsWith(cache.text)) {
+      const start = lastLineStart(cache.text);
+      count = cache.count - countNonBlankLines(cache.text, start) + countNonBlankLines(text, start);
+    } else {
+      count = countNonBlankLines(text);
+    }
+    node._mrmLineCount = { text, count };
+    return count;
+  },
+
+  // Run updateSelectedIndexMax once edits of a node have settled
+  scheduleLineCountUpdate(node) {
+    clearTimeout(node._mrmLineCountTimer);
+    node._mrmLineCountTimer = setTimeout(() => {
+      node._mrmLineCountTimer = null;
+      this.updateSelectedIndexMax(node);
+    }, LINE_COUNT_DEBOUNCE_MS);
   },
 
   // Function to update word count display using ComfyUI widget system
@@ -34,7 +89,7 @@ app.registerExtension({
       return;
     }
     
-    const count = this.countWords(replacementWordsWidget.value || "");
+    const count = this.getLineCount(node, replacementWordsWidget.value);
     const displayText = `max lines: ${count}`;
     
     // Create line count widget if it doesn't exist
@@ -78,14 +133,11 @@ app.registerExtension({
       console.log("[PromptSelector] Created line count widget");
     }
     
-    // Update the display value
-    if (lineCountWidget) {
+    // Update the display value, redrawing only when it changed
+    if (lineCountWidget && lineCountWidget.value !== displayText) {
       lineCountWidget.value = displayText;
-      // Force redraw
-      app.graph.setDirtyCanvas(true, true);
+      app.graph.setDirtyCanvas(true, false);
     }
-    
-    console.log(`[PromptSelector] Updated line count: ${displayText}`);
   },
 
   // Function to update max value for selected_index based on replacement_words
@@ -105,10 +157,9 @@ app.registerExtension({
     }
     
     if (replacementWordsWidget && selectedIndexWidget) {
-      // Count non-empty lines
-      const text = replacementWordsWidget.value || "";
-      const lines = text.split('\n').filter(line => line.trim().length > 0);
-      const maxValue = Math.max(0, lines.length - 1); // Max is length - 1 (0-indexed)
+      // Count non-empty lines (cached and incremental)
+      const lineCount = this.getLineCount(node, replacementWordsWidget.value);
+      const maxValue = Math.max(0, lineCount - 1); // Max is length - 1 (0-indexed)
       
       // Update the max value
       if (selectedIndexWidget.options) {
@@ -122,8 +173,6 @@ app.registerExtension({
           selectedIndexWidget.callback(maxValue);
         }
       }
-      
-      console.log(`[PromptSelector] Updated max for selected_index to ${maxValue} (${lines.length} words)`);
     }
     
     // Also update word count display
@@ -199,7 +248,8 @@ app.registerExtension({
     app.extensions.PromptSelectorUI = {
       updateSelectedIndexMax: self.updateSelectedIndexMax.bind(self),
       updateWordCountDisplay: self.updateWordCountDisplay.bind(self),
-      countWords: self.countWords.bind(self)
+      countWords: self.countWords.bind(self),
+      scheduleLineCountUpdate: self.scheduleLineCountUpdate.bind(self)
     };
     
     // Update max and word count for all existing PromptSelector nodes when graph loads
@@ -275,16 +325,8 @@ app.registerExtension({
                 if (originalCallback) {
                   originalCallback(value);
                 }
-                // Update max and line count when replacement_words changes
-                const extension = app.extensions?.PromptSelectorUI;
-                if (extension) {
-                  if (extension.updateSelectedIndexMax) {
-                    extension.updateSelectedIndexMax(node);
-                  }
-                  if (extension.updateWordCountDisplay) {
-                    extension.updateWordCountDisplay(node);
-                  }
-                }
+                // Update max and line count once edits of replacement_words settle
+                self.scheduleLineCountUpdate(node);
               };
             }
           }
@@ -292,44 +334,51 @@ app.registerExtension({
       }
     };
     
-    // Listen for the update message from Python
-    api.addEventListener("mrm.promptselector.update", (evt) => {
-      console.log("[PromptSelector] Received update event:", evt.detail);
-      
-      const nodeId = evt.detail.node;
-      const newIndex = evt.detail.selected_index;
+    // Apply one selected_index update; returns true if a widget changed
+    const applyUpdate = (update) => {
+      const nodeId = update.node;
+      const newIndex = update.selected_index;
       
       if (!nodeId) {
-        console.warn("[PromptSelector] No node ID in event data:", evt.detail);
-        return;
+        console.warn("[PromptSelector] No node ID in event data:", update);
+        return false;
       }
+      if (!app.graph) return false;
       
       // Find the specific node by ID (handle both string and number types)
-      if (app.graph && app.graph._nodes) {
-        const node = app.graph._nodes.find(n => String(n.id) === String(nodeId));
-        
-        if (node) {
-          console.log("[PromptSelector] Found node by ID:", nodeId);
-          
-          if (node.widgets) {
-            for (const widget of node.widgets) {
-              if (widget.name === "selected_index") {
-                console.log("[PromptSelector] Updating widget from", widget.value, "to", newIndex);
-                widget.value = newIndex;
-                // Call the widget's callback if it exists to ensure proper update
-                if (widget.callback) {
-                  widget.callback(newIndex);
-                }
-                break;
-              }
-            }
-          }
-          
-          // Force redraw to update the UI
-          app.graph.setDirtyCanvas(true, true);
-        } else {
-          console.warn("[PromptSelector] Node not found with ID:", nodeId);
-        }
+      const node = app.graph.getNodeById?.(nodeId) ??
+        app.graph._nodes?.find(n => String(n.id) === String(nodeId));
+      if (!node) {
+        console.warn("[PromptSelector] Node not found with ID:", nodeId);
+        return false;
+      }
+      
+      const widget = node.widgets?.find(w => w.name === "selected_index");
+      if (!widget || widget.value === newIndex) return false;
+      widget.value = newIndex;
+      // Call the widget's callback if it exists to ensure proper update
+      if (widget.callback) {
+        widget.callback(newIndex);
+      }
+      return true;
+    };
+    
+    // The server coalesces updates: one message carries the latest index of every node
+    api.addEventListener("mrm.promptselector.batch_update", (evt) => {
+      let changed = false;
+      for (const update of evt.detail?.updates || []) {
+        changed = applyUpdate(update) || changed;
+      }
+      // One redraw for the whole batch
+      if (changed) {
+        app.graph.setDirtyCanvas(true, false);
+      }
+    });
+    
+    // Single updates, as sent by earlier versions of the node
+    api.addEventListener("mrm.promptselector.update", (evt) => {
+      if (applyUpdate(evt.detail || {})) {
+        app.graph.setDirtyCanvas(true, false);
       }
     });
   },